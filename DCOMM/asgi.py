@@ -9,8 +9,39 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
+from django.urls import reverse
+from django.utils.functional import cached_property
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DCOMM.settings')
+# route the JSON API to DisciplineCommittee.async_views (see settings.ASYNC_API_VIEWS)
+os.environ.setdefault('DCOMM_ASYNC_API_VIEWS', '1')
 
-application = get_asgi_application()
+
+class PortalASGIHandler(ASGIHandler):
+    """Django's ASGI handler, minus the per-request thread for event streams.
+
+    Django runs each request in its own ThreadSensitiveContext, whose
+    executor thread (started by the first sync middleware) lives until the
+    response ends: one idle thread per open event stream. Streams are
+    served outside it, so their sync work shares Django's single
+    thread-sensitive thread instead.
+    """
+
+    stream_urls = ('student_events',)
+
+    @cached_property
+    def stream_paths(self):
+        return {reverse(name) for name in self.stream_urls}
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get('path', '').removeprefix(scope.get('root_path', ''))
+        if scope['type'] == 'http' and path in self.stream_paths:
+            await self.handle(scope, receive, send)
+        else:
+            await super().__call__(scope, receive, send)
+
+
+django.setup(set_prefix=False)
+application = PortalASGIHandler()
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+import dj_database_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +45,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'DisciplineCommittee.replicas.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,6 +86,54 @@ DATABASES = {
     }
 }
 
+# DCOMM_DB_PROFILE=production: WAL + tuned pragmas, persistent connections
+# and a busy timeout, so concurrent case submissions queue for the write
+# lock instead of failing with "database is locked".
+DB_PROFILE = os.environ.get('DCOMM_DB_PROFILE', 'default')
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',        # readers no longer block the writer (and vice versa)
+    'synchronous': 'NORMAL',      # fsync at checkpoints only; safe with WAL
+    'cache_size': -64000,         # 64 MB page cache per connection
+    'mmap_size': 268435456,       # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+}
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.environ.get('DCOMM_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': float(os.environ.get('DCOMM_DB_TIMEOUT', 20)),  # busy wait, seconds
+            # take the write lock at BEGIN, where the busy timeout applies,
+            # instead of failing when a read transaction upgrades
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(f'PRAGMA {k}={v}' for k, v in SQLITE_PRODUCTION_PRAGMAS.items()),
+        },
+    })
+elif DB_PROFILE != 'default':
+    raise ValueError(f'Unknown DCOMM_DB_PROFILE {DB_PROFILE!r}; use "default" or "production"')
+
+# Read replica (DCOMM_REPLICA_URL, any dj-database-url URL). Views marked
+# @replica_reads read from it; writes always go to the primary and pin the
+# client to the primary for REPLICA_PIN_SECONDS so it reads its own writes
+# while the replica catches up. Set the pin to at least the replica's lag.
+REPLICA_URL = os.environ.get('DCOMM_REPLICA_URL')
+if REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        REPLICA_URL, conn_max_age=DATABASES['default'].get('CONN_MAX_AGE', 0),
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+REPLICA_DATABASE = 'replica' if REPLICA_URL else None
+REPLICA_PIN_SECONDS = int(os.environ.get('DCOMM_REPLICA_PIN_SECONDS', 5))
+REPLICA_PIN_COOKIE = 'dcomm_primary'
+DATABASE_ROUTERS = ['DisciplineCommittee.replicas.ReplicaRouter']
+
+# retry_on_locked (DisciplineCommittee/db.py): attempts after the first and
+# the first backoff in seconds (doubles each retry)
+DB_LOCK_RETRIES = 5
+DB_LOCK_BACKOFF = 0.05
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -103,6 +154,88 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Passwords are PBKDF2-SHA256 with PASSWORD_HASH_ITERATIONS rounds; after
+# changing it, each password is re-hashed on the user's next login.
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('DCOMM_PASSWORD_HASH_ITERATIONS', 1_000_000))
+
+PASSWORD_HASHERS = [
+    'DisciplineCommittee.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+
+# Caches. DCOMM_CACHE_PROFILE (defaults to DB_PROFILE) picks the backend:
+#   default    - local memory; per process, fine for runserver and tests
+#   production - Redis at DCOMM_REDIS_URL (needs the redis package), shared
+#                by every worker on every host. Each alias has its own
+#                Redis database, since clear() flushes a whole database.
+#                Sessions live there too, so give it a maxmemory-policy
+#                that never evicts keys without an expiry (volatile-*).
+# DCOMM_<NAME>_CACHE_BACKEND/_LOCATION override one alias.
+CACHE_PROFILE = os.environ.get('DCOMM_CACHE_PROFILE', DB_PROFILE)
+if CACHE_PROFILE not in ('default', 'production'):
+    raise ValueError(f'Unknown DCOMM_CACHE_PROFILE {CACHE_PROFILE!r}; use "default" or "production"')
+REDIS_URL = os.environ.get('DCOMM_REDIS_URL', 'redis://127.0.0.1:6379')
+REDIS_DATABASES = {'default': 0, 'sessions': 1, 'dashboards': 2}
+
+
+def _cache(alias, env_prefix, max_entries=None, **params):
+    if CACHE_PROFILE == 'production':
+        config = {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': f'{REDIS_URL}/{REDIS_DATABASES[alias]}',
+        }
+    else:
+        config = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': alias}
+        if max_entries:
+            config['OPTIONS'] = {'MAX_ENTRIES': max_entries}
+    config['BACKEND'] = os.environ.get(f'{env_prefix}_BACKEND', config['BACKEND'])
+    config['LOCATION'] = os.environ.get(f'{env_prefix}_LOCATION', config['LOCATION'])
+    return {**config, **params}
+
+
+# login throttling
+CACHES = {
+    'default': _cache('default', 'DCOMM_CACHE'),
+}
+
+# Sessions: DCOMM_SESSION_MODE picks where they live.
+#   db             - django_session table; a SELECT per request (default)
+#   cached_db      - write-through: reads come from the sessions cache
+#   cache          - sessions cache only; lost if the cache is wiped
+#   signed_cookies - in the cookie itself; no server-side storage at all
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_MODE = os.environ.get('DCOMM_SESSION_MODE', 'db')
+if SESSION_MODE not in SESSION_ENGINES:
+    raise ValueError(f'Unknown DCOMM_SESSION_MODE {SESSION_MODE!r}; use one of {", ".join(SESSION_ENGINES)}')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+SESSION_CACHE_ALIAS = 'sessions'
+
+# sessions get their own cache, separate from 'default' so clearing one
+# does not log everybody out; in local memory sized well above the
+# default 300 entries
+CACHES['sessions'] = _cache(
+    'sessions', 'DCOMM_SESSION_CACHE', max_entries=100_000,
+    TIMEOUT=None,  # the session backends pass their own expiry
+)
+
+# Login throttling (DisciplineCommittee/throttle.py): token buckets as
+# (burst, seconds to refill the whole burst)
+LOGIN_THROTTLE_ENABLED = True
+LOGIN_THROTTLE_CACHE = 'default'
+LOGIN_THROTTLE_IP = (20, 60)           # per client IP
+LOGIN_THROTTLE_IDENTITY = (5, 300)     # per USN / email
+LOGIN_THROTTLE_TRUST_X_FORWARDED_FOR = os.environ.get('DCOMM_TRUST_X_FORWARDED_FOR') == '1'
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -130,3 +263,35 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+# Student directory cache behind /api/get-student/ (per worker process)
+STUDENT_DIRECTORY_SIZE = 5000
+STUDENT_DIRECTORY_TTL = 300  # seconds
+
+# Student event stream (/api/student/events/)
+STUDENT_EVENTS_HEARTBEAT = 20      # seconds between keep-alives / polls for other workers' cases
+STUDENT_EVENTS_MAX_AGE = 300       # seconds before the client is asked to reconnect
+STUDENT_EVENTS_RETRY_MS = 3000     # reconnect delay after a stream ends (ASGI)
+STUDENT_EVENTS_POLL_MS = 15000     # reconnect delay when served over WSGI
+
+# Activity log buffering (DisciplineCommittee/activity.py)
+ACTIVITY_BUFFERING = True
+ACTIVITY_BUFFER_SIZE = 200        # flush once this many entries are queued
+ACTIVITY_FLUSH_INTERVAL = 5       # ... or once the oldest is this many seconds old
+ACTIVITY_HISTORY_LIMIT = 50       # activities prune_activity keeps hot per user; None keeps everything
+ACTIVITY_ARCHIVE = True           # move pruned rows to ActivityArchive instead of deleting
+
+# Serve the JSON API with the native async views. asgi.py turns this on;
+# WSGI servers keep the sync views.
+ASYNC_API_VIEWS = os.environ.get('DCOMM_ASYNC_API_VIEWS') == '1'
+
+# Rendered dashboards per user (DisciplineCommittee/dashboard_cache.py),
+# plus the prior-count and committee analytics entries stored under the
+# same versions. Their own cache, so clearing or culling it drops only
+# these entries (which are rebuilt on a miss), never sessions or the
+# login throttle buckets. The version bumps only reach workers that share
+# it, so with more than one worker process use the production profile.
+DASHBOARD_CACHE = 'dashboards'
+# In local memory: a version key and a page or two per student and teacher.
+CACHES[DASHBOARD_CACHE] = _cache('dashboards', 'DCOMM_DASHBOARD_CACHE', max_entries=50_000)
+DASHBOARD_CACHE_TIMEOUT = 600  # seconds; versions make stale entries unreachable anyway
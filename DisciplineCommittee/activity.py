@@ -0,0 +1,225 @@
+"""Buffered writer for the Activity log.
+
+Login and profile views record activities in memory instead of inserting
+a row inside the request. The buffer is written with one bulk_create
+when it reaches ACTIVITY_BUFFER_SIZE entries or is older than
+ACTIVITY_FLUSH_INTERVAL seconds. Flushes run from the request_finished
+signal, i.e. after the response has gone out, from a timer thread so an
+idle worker still writes its buffer, and once more at process exit so a
+worker shutdown does not lose buffered entries.
+
+A flush that hits a locked database keeps the batch for the next one.
+Any other error is retried row by row, and the rows that still fail
+(e.g. for a user deleted meanwhile) are logged and dropped, so one bad
+entry cannot hold the buffer back for good.
+
+With ACTIVITY_HISTORY_LIMIT set, ``manage.py prune_activity`` (run it
+from cron or the scheduler) trims every user to the latest N activities;
+older rows move to ActivityArchive (or are deleted when ACTIVITY_ARCHIVE
+is off). Flushes never prune: they run on the request thread, and the
+reads only look at the newest rows, which the index serves however long
+a user's history grows between runs.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .db import is_lock_error
+from .models import Activity, ActivityArchive
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityRecorder:
+
+    def __init__(self):
+        self._pending = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def record(self, user, action, details=''):
+        if not settings.ACTIVITY_BUFFERING:
+            Activity.objects.create(user=user, action=action, details=details)
+            return
+        activity = Activity(user_id=user.pk, action=action, details=details, timestamp=timezone.now())
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(activity)
+            if self._timer is None:
+                self._timer = threading.Thread(target=self._flush_when_due, name='activity-flush', daemon=True)
+                self._timer.start()
+
+    def _flush_when_due(self):
+        # request_finished never fires in an idle worker
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._timer = None
+                    return
+                wait = self._oldest + settings.ACTIVITY_FLUSH_INTERVAL - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Activity flush failed')
+            finally:
+                connection.close()
+
+    def pending_for(self, user_id):
+        """Buffered activities of one user, newest first."""
+        with self._lock:
+            return [a for a in reversed(self._pending) if a.user_id == user_id]
+
+    def due(self):
+        with self._lock:
+            if not self._pending:
+                return False
+            return (len(self._pending) >= settings.ACTIVITY_BUFFER_SIZE
+                    or time.monotonic() - self._oldest >= settings.ACTIVITY_FLUSH_INTERVAL)
+
+    def flush(self):
+        """Write everything buffered so far. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._oldest = None
+            if not batch:
+                return 0
+            try:
+                self._insert(batch)
+            except DatabaseError as exc:
+                if is_lock_error(exc):
+                    self._keep(batch)
+                    return 0
+                return self._insert_each(batch)
+            return len(batch)
+
+    def _insert(self, batch):
+        # a savepoint when called inside a transaction, so a failure does not break it
+        with transaction.atomic():
+            Activity.objects.bulk_create(batch)
+
+    def _insert_each(self, batch):
+        written = 0
+        for i, activity in enumerate(batch):
+            try:
+                self._insert([activity])
+            except DatabaseError as exc:
+                if is_lock_error(exc):
+                    self._keep(batch[i:])
+                    break
+                logger.exception('Dropping activity %r of user %s', activity.action, activity.user_id)
+            else:
+                written += 1
+        return written
+
+    def _keep(self, batch):
+        logger.warning('Database locked; keeping %d activities for the next flush', len(batch))
+        with self._lock:
+            self._pending[:0] = batch
+            self._oldest = time.monotonic()
+
+
+recorder = ActivityRecorder()
+
+
+def record(user, action, details=''):
+    recorder.record(user, action, details)
+
+
+async def arecord(user, action, details=''):
+    if settings.ACTIVITY_BUFFERING:
+        recorder.record(user, action, details)
+    else:
+        await sync_to_async(recorder.record)(user, action, details)
+
+
+def _pending_activities(user, limit):
+    return [
+        {'action': a.action, 'details': a.details, 'timestamp': a.timestamp}
+        for a in recorder.pending_for(user.pk)[:limit]
+    ]
+
+
+def _stored_activities(user, limit):
+    return Activity.objects.filter(user=user).values('action', 'details', 'timestamp')[:limit]
+
+
+def recent_activities(user, limit=10):
+    """Latest activities of ``user`` as dicts, including unflushed ones."""
+    pending = _pending_activities(user, limit)
+    if len(pending) >= limit:
+        return pending
+    return pending + list(_stored_activities(user, limit - len(pending)))
+
+
+async def arecent_activities(user, limit=10):
+    """Async version of recent_activities()."""
+    pending = _pending_activities(user, limit)
+    if len(pending) >= limit:
+        return pending
+    return pending + [a async for a in _stored_activities(user, limit - len(pending))]
+
+
+def latest_pending_timestamp(user):
+    pending = recorder.pending_for(user.pk)
+    return pending[0].timestamp if pending else None
+
+
+ARCHIVE_FIELDS = ('user_id', 'action', 'details', 'timestamp')
+
+
+def prune_user(user_id, keep=None, archive=None):
+    """Trim one user's hot history to the latest ``keep`` rows. Returns rows removed."""
+    keep = settings.ACTIVITY_HISTORY_LIMIT if keep is None else keep
+    archive = settings.ACTIVITY_ARCHIVE if archive is None else archive
+    # the keep-th newest row is the boundary; one index probe when under the cap
+    boundary = (Activity.objects.filter(user_id=user_id)
+                .order_by('-timestamp', '-id')
+                .values_list('timestamp', 'id')[keep:keep + 1])
+    boundary = list(boundary)
+    if not boundary:
+        return 0
+    timestamp, pk = boundary[0]
+    older = Activity.objects.filter(user_id=user_id).filter(
+        Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lte=pk)
+    )
+    with transaction.atomic():
+        if archive:
+            ActivityArchive.objects.bulk_create(
+                ActivityArchive(**row) for row in older.values(*ARCHIVE_FIELDS)
+            )
+        removed, _ = older.delete()
+    return removed
+
+
+def prune_history(user_ids=None, keep=None, archive=None):
+    """Prune ``user_ids`` (default: every user over the cap). Returns rows removed."""
+    keep = settings.ACTIVITY_HISTORY_LIMIT if keep is None else keep
+    if user_ids is None:
+        user_ids = (Activity.objects.order_by().values('user_id')
+                    .annotate(n=Count('id')).filter(n__gt=keep)
+                    .values_list('user_id', flat=True))
+    return sum(prune_user(user_id, keep, archive) for user_id in list(user_ids))
+
+
+def _flush_if_due(**kwargs):
+    if recorder.due():
+        recorder.flush()
+
+
+request_finished.connect(_flush_if_due, dispatch_uid='activity_flush_if_due')
+atexit.register(recorder.flush)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import StudentProfile, TeacherProfile, Activity,Student,Case
+from .models import StudentProfile, TeacherProfile, Activity,ActivityArchive,Student,Case
 
 
 admin.site.register(Case)
@@ -21,4 +21,10 @@ class TeacherProfileAdmin(admin.ModelAdmin):
 class ActivityAdmin(admin.ModelAdmin):
     list_display = ('user', 'action', 'timestamp')
     search_fields = ('user__username', 'action')
-    list_filter = ('timestamp',)    
+    list_filter = ('timestamp',)
+
+
+@admin.register(ActivityArchive)
+class ActivityArchiveAdmin(admin.ModelAdmin):
+    list_display = ('user', 'action', 'timestamp', 'archived_at')
+    search_fields = ('user__username', 'action')
@@ -0,0 +1,85 @@
+"""Case counts by department, year, case type and month.
+
+Every answer comes from the CaseRollup buckets maintained by counters.py,
+never from the Case table: a slice sums at most a few thousand small
+rows, however many cases there are. Answers are also cached under the
+committee version in dashboard_cache.py, which every case write bumps,
+so a repeated slice is a cache read.
+"""
+import datetime
+import hashlib
+
+from django.db.models import Sum
+
+from . import dashboard_cache
+from .models import CaseRollup
+
+DIMENSIONS = ("department", "year", "case_type", "month")
+FILTER_FIELDS = ("department", "year", "case_type", "month_from", "month_to", "group_by")
+
+
+def _parse_month(params, name):
+    value = (params.get(name) or "").strip()
+    if not value:
+        return None
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise ValueError(f"{name} must be a YYYY-MM month") from None
+
+
+def _values(params, name):
+    return [v.strip() for v in (params.get(name) or "").split(",") if v.strip()]
+
+
+def case_counts(params):
+    """Count cases in the slice described by ``params``; see _case_counts()."""
+    query = "&".join(f"{name}={(params.get(name) or '').strip()}" for name in FILTER_FIELDS)
+    ident = hashlib.md5(query.encode()).hexdigest()
+    version = dashboard_cache.version(dashboard_cache.COMMITTEE, dashboard_cache.COMMITTEE_ALL)
+    counts = dashboard_cache.get_page(dashboard_cache.COMMITTEE, ident, version)
+    if counts is None:
+        counts = _case_counts(params)
+        dashboard_cache.set_page(dashboard_cache.COMMITTEE, ident, version, counts)
+    return counts
+
+
+def _case_counts(params):
+    """Count cases in the slice described by ``params``.
+
+    department, year and case_type take one value or a comma-separated
+    list; month_from and month_to (YYYY-MM) bound the month; group_by is a
+    comma-separated list of DIMENSIONS. Returns ``{"total", "group_by",
+    "groups"}``, each group holding its dimension values and ``count``.
+    Raises ValueError for malformed parameters.
+    """
+    group_by = _values(params, "group_by")
+    unknown = [d for d in group_by if d not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"group_by must be made of {', '.join(DIMENSIONS)}")
+    group_by = list(dict.fromkeys(group_by))
+
+    rollups = CaseRollup.objects.filter(count__gt=0)
+    for field in ("department", "year", "case_type"):
+        values = _values(params, field)
+        if values:
+            rollups = rollups.filter(**{f"{field}__in": values})
+    month_from = _parse_month(params, "month_from")
+    month_to = _parse_month(params, "month_to")
+    if month_from:
+        rollups = rollups.filter(month__gte=month_from)
+    if month_to:
+        rollups = rollups.filter(month__lte=month_to)
+
+    if not group_by:
+        total = rollups.aggregate(n=Sum("count"))["n"] or 0
+        return {"total": total, "group_by": [], "groups": []}
+
+    groups = []
+    for row in rollups.order_by().values(*group_by).annotate(count=Sum("count")):
+        if "month" in row:
+            row["month"] = row["month"].strftime("%Y-%m")
+        groups.append(row)
+    # the coded columns would sort by code; order by label instead
+    groups.sort(key=lambda row: [row[d] for d in group_by])
+    return {"total": sum(g["count"] for g in groups), "group_by": group_by, "groups": groups}
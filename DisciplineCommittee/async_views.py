@@ -0,0 +1,235 @@
+"""Native async versions of the JSON API views.
+
+Under ASGI (DCOMM/asgi.py sets ASYNC_API_VIEWS) urls.py routes the api/
+endpoints here; under WSGI/gunicorn the sync views in views.py are used.
+Request parsing, querysets and serialisation are shared helpers in
+views.py, so both return the same JSON; only the awaiting differs.
+
+Django's async ORM methods (aget, acreate, async for, ...) still run
+each query through the thread-sensitive sync_to_async executor, so a
+request waiting on the database does hold that thread. What the event
+loop gains is everything around the queries: cache hits (the directory,
+dashboard versions) and long-lived responses such as the event stream
+never take a thread at all.
+
+api_search_cases stays sync: it runs raw FTS5 SQL, which has no async
+cursor.
+"""
+import json
+from functools import wraps
+
+from django.contrib.auth import alogin, alogout
+from django.contrib.auth.models import User
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
+
+from . import activity, dashboard_cache, directory, throttle
+from .counters import aprior_counts
+from .models import Student, StudentProfile
+from .pagination import akeyset_page, parse_limit
+from .replicas import replica_reads
+from .views import (
+    _ais_teacher, _profile_etag_from, _profile_json, _profile_version, _requested_usns,
+    _student_case_rows, _student_cases_json, _student_etag, _student_json, _students_json,
+    _teacher_case_rows, _teacher_cases_json, _throttled,
+)
+
+
+def acondition(etag_func):
+    """@condition for async views whose ETag needs an awaited query.
+
+    Django's decorator calls etag_func synchronously, which cannot touch
+    the ORM from the event loop.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if etag and request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
+
+
+async def _get_student_etag(request):
+    student = await directory.aget_student(request.GET.get('usn'))
+    if student is None:
+        return None
+    user = await request.auser()
+    return _student_etag(
+        student,
+        await dashboard_cache.aversion(dashboard_cache.STUDENT, student['usn']),
+        await _ais_teacher(user),
+    )
+
+
+@replica_reads
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@acondition(_get_student_etag)
+async def get_student(request):
+    student = await directory.aget_student(request.GET.get('usn'))
+    if student is None:
+        return JsonResponse({'error': 'Student not found'}, status=404)
+    user = await request.auser()
+    if not await _ais_teacher(user):
+        return JsonResponse(_student_json(student))
+    prior_cases = (await aprior_counts([student['usn']]))[student['usn']]
+    return JsonResponse(_student_json(student, prior_cases))
+
+
+async def get_students(request):
+    user = await request.auser()
+    if not await _ais_teacher(user):
+        return JsonResponse({'error': 'not authorised'}, status=403)
+    try:
+        usns = _requested_usns(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    found = await directory.aget_students(usns)
+    return JsonResponse(_students_json(usns, found, await aprior_counts(list(found))))
+
+
+@csrf_exempt
+async def api_student_register(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=400)
+    try:
+        data = json.loads(request.body)
+        usn = data.get('usn')
+        email = data.get('email')
+        password = data.get('password')
+        if not (usn and email and password):
+            return JsonResponse({'error': 'usn, email and password are required'}, status=400)
+        if await StudentProfile.objects.filter(usn=usn).aexists():
+            return JsonResponse({'error': 'USN already registered'}, status=400)
+        user = await User.objects.acreate_user(username=usn, email=email, password=password)
+        await StudentProfile.objects.acreate(user=user, usn=usn)
+        await activity.arecord(user, 'registered', 'Student registered')
+        return JsonResponse({'success': True})
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+async def api_student_login(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=400)
+    try:
+        data = json.loads(request.body)
+        usn = data.get('usn')
+        password = data.get('password')
+        if not (usn and password):
+            return JsonResponse({'error': 'usn and password required'}, status=400)
+        allowed, retry_after = await throttle.aallow_login(request, usn)
+        if not allowed:
+            return _throttled(retry_after)
+        try:
+            profile = await StudentProfile.objects.select_related('user').aget(usn=usn)
+        except StudentProfile.DoesNotExist:
+            return JsonResponse({'error': 'invalid credentials'}, status=400)
+        user = await throttle.aauthenticate_timed(request, username=profile.user.username, password=password)
+        if user is None:
+            return JsonResponse({'error': 'invalid credentials'}, status=400)
+        await alogin(request, user)
+        await activity.arecord(user, 'logged in', 'Student logged in')
+        activities = await activity.arecent_activities(user)
+        return JsonResponse({'success': True, 'profile': _profile_json(profile, user), 'activities': activities})
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+async def _profile_etag(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None
+    return _profile_etag_from(user, await _profile_version(user).afirst())
+
+
+@replica_reads
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@acondition(_profile_etag)
+async def api_get_profile(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'not authenticated'}, status=403)
+    try:
+        profile = await StudentProfile.objects.aget(user=user)
+    except StudentProfile.DoesNotExist:
+        return JsonResponse({'error': 'profile not found'}, status=404)
+    activities = await activity.arecent_activities(user)
+    return JsonResponse({'profile': _profile_json(profile, user), 'activities': activities})
+
+
+@csrf_exempt
+async def api_update_profile(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'not authenticated'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=400)
+    try:
+        profile = await StudentProfile.objects.aget(user=user)
+    except StudentProfile.DoesNotExist:
+        return JsonResponse({'error': 'profile not found'}, status=404)
+    data = json.loads(request.body)
+    changed_fields = []
+    for field in ('full_name', 'phone', 'course', 'address'):
+        if field in data:
+            setattr(profile, field, data[field])
+            changed_fields.append(field)
+    await profile.asave()
+    await activity.arecord(user, 'updated profile', f'updated fields: {changed_fields}')
+    return JsonResponse({'success': True, 'profile': _profile_json(profile, user)})
+
+
+@csrf_exempt
+async def api_logout(request):
+    await alogout(request)
+    return JsonResponse({'success': True})
+
+
+async def api_student_cases(request):
+    student_id = await request.session.aget('student_id')
+    if not student_id:
+        return JsonResponse({'error': 'not authenticated'}, status=403)
+
+    usn = await Student.objects.filter(id=student_id).values_list('usn', flat=True).afirst()
+    if usn is None:
+        return JsonResponse({'error': 'student not found'}, status=404)
+
+    try:
+        rows, next_cursor = await akeyset_page(
+            _student_case_rows(usn),
+            cursor=request.GET.get('cursor'),
+            limit=parse_limit(request.GET.get('limit')),
+        )
+    except ValueError:
+        return JsonResponse({'error': 'invalid cursor'}, status=400)
+    return JsonResponse(_student_cases_json(rows, next_cursor))
+
+
+async def api_teacher_cases(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'not authenticated'}, status=403)
+    try:
+        cases, next_cursor = await akeyset_page(
+            _teacher_case_rows(user, request.GET),
+            cursor=request.GET.get('cursor'),
+            limit=parse_limit(request.GET.get('limit'), default=25),
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(_teacher_cases_json(cases, next_cursor))
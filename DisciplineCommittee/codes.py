@@ -0,0 +1,188 @@
+"""Integer codes for the short labels repeated on every row.
+
+Department, year and case type are stored as small integers
+(CodedField) on Case, Student, UniformViolation and the counter tables;
+each label is stored once, in the Code table. Python code, filters and
+values() still see the labels: the field maps them both ways through an
+in-process cache, so filters and GROUP BY run on the integer column.
+
+Labels are only ever added, so the cache can be incomplete but never
+wrong, with one exception it is built to avoid: a label whose insert is
+rolled back. A label's code is therefore derived from the label itself
+(crc32, probing past the rare collision) rather than handed out by a
+sequence, mappings read inside an open transaction are not cached, and
+a new label is cached only once its transaction commits.
+
+Each kind holds at most MAX_LABELS labels, so the Code table (read whole
+on every cache miss) stays small; code_for() raises LabelError past it.
+Callers taking labels from clients should only accept known() ones.
+"""
+import threading
+import zlib
+
+from django.core.validators import MaxLengthValidator
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, models, transaction
+from django import forms
+from django.utils.functional import cached_property
+
+DEPARTMENT = "department"
+YEAR = "year"
+CASE_TYPE = "case_type"
+
+# SQLite stores integers up to 32767 in two bytes
+CODE_SPACE = 1 << 15
+# what a filter on a label nobody has used yet compares against
+UNKNOWN = 0
+# labels per kind; far below CODE_SPACE so probing always finds a free code
+MAX_LABELS = 1000
+
+_codes = {}   # (kind, label) -> code
+_labels = {}  # (kind, code) -> label
+_lock = threading.Lock()
+
+
+class LabelError(ValueError):
+    pass
+
+
+def initial_code(kind, label):
+    return zlib.crc32(f"{kind}:{label}".encode()) % (CODE_SPACE - 1) + 1
+
+
+def next_code(code):
+    return code % (CODE_SPACE - 1) + 1
+
+
+def _remember(kind, code, label):
+    with _lock:
+        _codes[kind, label] = code
+        _labels[kind, code] = label
+
+
+def _cacheable():
+    # only what is committed; a test's own wrapping transaction does not count
+    connection = connections[DEFAULT_DB_ALIAS]
+    return all(block._from_testcase for block in connection.atomic_blocks)
+
+
+def _fetch(kind, label=None, code=None):
+    """Read the whole (small) Code table and return the match, if any."""
+    from .models import Code
+
+    rows = Code.objects.using(DEFAULT_DB_ALIAS).values_list("kind", "code", "label")
+    cacheable = _cacheable()
+    found = None
+    for row_kind, row_code, row_label in rows:
+        if cacheable:
+            _remember(row_kind, row_code, row_label)
+        if row_kind == kind and (row_label == label if code is None else row_code == code):
+            found = row_code if code is None else row_label
+    return found
+
+
+def _create(kind, label):
+    from .models import Code
+
+    taken = set(Code.objects.using(DEFAULT_DB_ALIAS).filter(kind=kind).values_list("code", flat=True))
+    if len(taken) >= MAX_LABELS:
+        raise LabelError(f"no room for another {kind} label ({MAX_LABELS} in use)")
+    code = initial_code(kind, label)
+    while code in taken:
+        code = next_code(code)
+    try:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            Code.objects.using(DEFAULT_DB_ALIAS).create(kind=kind, code=code, label=label)
+    except IntegrityError:
+        # another process added this label, or took the code, first
+        return code_for(kind, label, create=True)
+    if _cacheable():
+        _remember(kind, code, label)
+    else:
+        transaction.on_commit(lambda: _remember(kind, code, label), using=DEFAULT_DB_ALIAS)
+    return code
+
+
+def code_for(kind, label, create=False):
+    """The code of ``label``; None (or a new code, with ``create``) if unused."""
+    try:
+        return _codes[kind, label]
+    except KeyError:
+        pass
+    code = _fetch(kind, label=label)
+    if code is None and create:
+        code = _create(kind, label)
+    return code
+
+
+def known(kind, label):
+    """Whether ``label`` is already in use, i.e. saving it adds no Code row."""
+    return code_for(kind, label) is not None
+
+
+def label_for(kind, code):
+    try:
+        return _labels[kind, code]
+    except KeyError:
+        pass
+    label = _fetch(kind, code=code)
+    # only reachable for a row written outside CodedField
+    return label if label is not None else str(code)
+
+
+def clear():
+    with _lock:
+        _codes.clear()
+        _labels.clear()
+
+
+class CodedField(models.IntegerField):
+    """A short label stored as its integer code (see the module docstring).
+
+    The model attribute is the label string. ``label_length`` is the
+    longest label accepted, as max_length was for the CharField.
+    """
+
+    description = "Short label stored as an integer code"
+    # labels are text: like CharField, an unset label defaults to ""
+    empty_strings_allowed = True
+
+    def __init__(self, *args, kind, label_length, **kwargs):
+        self.kind = kind
+        self.label_length = label_length
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["kind"] = self.kind
+        kwargs["label_length"] = self.label_length
+        return name, path, args, kwargs
+
+    @cached_property
+    def validators(self):
+        # IntegerField's range validators would compare the label with ints
+        return [*self.default_validators, *self._validators, MaxLengthValidator(self.label_length)]
+
+    def to_python(self, value):
+        return value if value is None else str(value)
+
+    def from_db_value(self, value, expression, connection):
+        return value if value is None else label_for(self.kind, value)
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return None
+        code = code_for(self.kind, str(value))
+        return UNKNOWN if code is None else code
+
+    def get_db_prep_save(self, value, connection):
+        if value is None or hasattr(value, "as_sql"):
+            return value
+        return code_for(self.kind, str(value), create=True)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            "form_class": forms.CharField,
+            "max_length": self.label_length,
+            **kwargs,
+        })
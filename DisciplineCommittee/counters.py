@@ -0,0 +1,212 @@
+"""Counters maintained alongside Case writes.
+
+Every path that adds or removes cases calls apply_case_delta() inside the
+same transaction: single saves and deletes through the signals in
+signals.py, bulk paths (import, clear_complaints, ingest) directly. The
+counters are TeacherCaseStats per teacher, CaseRollup per department,
+year, case type and month, and StudentCaseCounter per USN and case type
+(the prior counts on the case forms). The rebuild commands recompute
+them from the Case table.
+"""
+import datetime
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import dashboard_cache
+from .models import Case, CaseRollup, StudentCaseCounter, TeacherCaseStats
+
+# Case type -> TeacherCaseStats column; other types only count towards total
+CASE_TYPE_FIELDS = {
+    "Late Arrival": "late_arrival",
+    "Academic Misconduct": "academic_misconduct",
+    "Uniform Violation": "uniform_violation",
+    "Other": "other",
+}
+
+# Fields the counters are keyed on; a save that changes one of these
+# moves the case from one bucket to another. usn keys the student's
+# dashboard version (dashboard_cache.py).
+COUNTED_FIELDS = ("created_by_id", "case_type", "usn", "department", "year", "date")
+
+ROLLUP_FIELDS = ("department", "year", "case_type", "month")
+STUDENT_COUNTER_FIELDS = ("usn", "case_type")
+# dashboard_cache page kind for prior_counts()
+PRIOR_COUNTS = "prior-counts"
+
+
+def _value(case, field):
+    return case[field] if isinstance(case, dict) else getattr(case, field)
+
+
+def _month(value):
+    # an unsaved Case may still hold the date as the string it was given
+    if isinstance(value, str):
+        value = parse_date(value)
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def rollup_bucket(case):
+    return (_value(case, "department"), _value(case, "year"), _value(case, "case_type"), _month(_value(case, "date")))
+
+
+def counted_values(case):
+    return {field: _value(case, field) for field in COUNTED_FIELDS}
+
+
+def apply_case_delta(cases, sign):
+    """Count ``cases`` in (sign=+1) or out (sign=-1) of every counter.
+
+    ``cases`` are Case instances or dicts holding COUNTED_FIELDS. Call this
+    inside the transaction that writes the cases.
+    """
+    cases = list(cases)
+    per_teacher = defaultdict(Counter)
+    per_bucket = Counter()
+    per_student = Counter()
+    for case in cases:
+        counts = per_teacher[_value(case, "created_by_id")]
+        counts["total"] += 1
+        field = CASE_TYPE_FIELDS.get(_value(case, "case_type"))
+        if field:
+            counts[field] += 1
+        per_bucket[rollup_bucket(case)] += 1
+        per_student[(_value(case, "usn"), _value(case, "case_type"))] += 1
+
+    now = timezone.now()
+    for user_id, counts in per_teacher.items():
+        _bump_teacher(user_id, counts, sign, now)
+    for bucket, n in per_bucket.items():
+        _bump_count(CaseRollup, dict(zip(ROLLUP_FIELDS, bucket)), n, sign)
+    for key, n in per_student.items():
+        _bump_count(StudentCaseCounter, dict(zip(STUDENT_COUNTER_FIELDS, key)), n, sign)
+    dashboard_cache.cases_changed(cases)
+
+
+def _bump_teacher(user_id, counts, sign, now):
+    updates = {field: F(field) + sign * n for field, n in counts.items()}
+    stats = TeacherCaseStats.objects.filter(user_id=user_id)
+    if stats.update(updated_at=now, **updates) or sign < 0:
+        return
+    # First case for this teacher. The row is created by the migration and
+    # rebuild command for existing data, so starting from zero is correct.
+    try:
+        with transaction.atomic():
+            TeacherCaseStats.objects.create(user_id=user_id, **counts)
+    except IntegrityError:
+        stats.update(updated_at=now, **updates)
+
+
+def _bump_count(model, key, n, sign):
+    # same first-row race as _bump_teacher; the unique key settles it
+    rows = model.objects.filter(**key)
+    if rows.update(count=F("count") + sign * n) or sign < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=n, **key)
+    except IntegrityError:
+        rows.update(count=F("count") + n)
+
+
+def _prior_count_rows(usns):
+    counts = {usn: dict.fromkeys(CASE_TYPE_FIELDS, 0) for usn in usns}
+    rows = StudentCaseCounter.objects.filter(usn__in=counts, count__gt=0)
+    return counts, rows.values_list("usn", "case_type", "count")
+
+
+def prior_counts(usns):
+    """``{usn: {case_type: count}}`` of filed cases, every case type present.
+
+    Cached per USN under the student's dashboard version, which every case
+    write for the USN bumps, so a form's repeat lookups cost no query.
+    """
+    versions = dashboard_cache.versions(dashboard_cache.STUDENT, usns)
+    cached = dashboard_cache.get_pages(PRIOR_COUNTS, versions)
+    missing = [usn for usn in versions if usn not in cached]
+    if missing:
+        counts, rows = _prior_count_rows(missing)
+        for usn, case_type, count in rows:
+            counts[usn][case_type] = count
+        dashboard_cache.set_pages(PRIOR_COUNTS, versions, counts)
+        cached.update(counts)
+    return cached
+
+
+async def aprior_counts(usns):
+    """Async version of prior_counts()."""
+    versions = await dashboard_cache.aversions(dashboard_cache.STUDENT, usns)
+    cached = await dashboard_cache.aget_pages(PRIOR_COUNTS, versions)
+    missing = [usn for usn in versions if usn not in cached]
+    if missing:
+        counts, rows = _prior_count_rows(missing)
+        async for usn, case_type, count in rows:
+            counts[usn][case_type] = count
+        await dashboard_cache.aset_pages(PRIOR_COUNTS, versions, counts)
+        cached.update(counts)
+    return cached
+
+
+def touch(case):
+    """Move the teacher's stats watermark for an edit that changes no count."""
+    TeacherCaseStats.objects.filter(user_id=_value(case, "created_by_id")).update(updated_at=timezone.now())
+    dashboard_cache.cases_changed([case])
+
+
+def rebuild_teacher_stats():
+    """Recompute TeacherCaseStats from the Case table. Returns rows written."""
+    per_teacher = defaultdict(Counter)
+    grouped = Case.objects.order_by().values("created_by_id", "case_type").annotate(n=Count("id"))
+    for row in grouped.iterator():
+        counts = per_teacher[row["created_by_id"]]
+        counts["total"] += row["n"]
+        field = CASE_TYPE_FIELDS.get(row["case_type"])
+        if field:
+            counts[field] += row["n"]
+
+    with transaction.atomic():
+        TeacherCaseStats.objects.all().delete()
+        TeacherCaseStats.objects.bulk_create(
+            TeacherCaseStats(user_id=user_id, **counts) for user_id, counts in per_teacher.items()
+        )
+    return len(per_teacher)
+
+
+def rebuild_rollups():
+    """Recompute CaseRollup from the Case table. Returns rows written."""
+    grouped = (
+        Case.objects.order_by()
+        .annotate(month=TruncMonth("date"))
+        .values(*ROLLUP_FIELDS)
+        .annotate(n=Count("id"))
+    )
+    with transaction.atomic():
+        CaseRollup.objects.all().delete()
+        rollups = CaseRollup.objects.bulk_create(
+            (CaseRollup(count=row.pop("n"), **row) for row in grouped.iterator()),
+            batch_size=1000,
+        )
+        dashboard_cache.bump(dashboard_cache.COMMITTEE, dashboard_cache.COMMITTEE_ALL)
+    return len(rollups)
+
+
+def rebuild_student_counters():
+    """Recompute StudentCaseCounter from the Case table. Returns rows written."""
+    grouped = Case.objects.order_by().values(*STUDENT_COUNTER_FIELDS).annotate(n=Count("id"))
+    with transaction.atomic():
+        usns = set(StudentCaseCounter.objects.values_list("usn", flat=True))
+        StudentCaseCounter.objects.all().delete()
+        counters = StudentCaseCounter.objects.bulk_create(
+            (StudentCaseCounter(count=row.pop("n"), **row) for row in grouped.iterator()),
+            batch_size=1000,
+        )
+        # get_student ETags are built from the student versions
+        for usn in usns | {counter.usn for counter in counters}:
+            dashboard_cache.bump(dashboard_cache.STUDENT, usn)
+    return len(counters)
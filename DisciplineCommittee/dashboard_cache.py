@@ -0,0 +1,204 @@
+"""Per-user cache of rendered dashboards, keyed by version counters.
+
+Each student (by USN) and each teacher (by user id) has a version number
+in the cache, and so do the committee's case counts (analytics.py), which
+any case write can change. A rendered dashboard is stored under the version it was
+rendered at, so a hit needs no query at all, and the dashboard ETags are
+built from the same versions.
+
+Anything that changes what a dashboard shows bumps the version:
+counters.apply_case_delta()/touch() for every case write (single saves,
+imports, bulk deletes), and the Student, StudentProfile, TeacherProfile
+and User signals in signals.py. Bumps happen immediately and again on
+commit, because a render that started before the commit may have stored
+the old data under the new version.
+
+With a read replica (settings.REPLICA_DATABASE) a reader that is not
+pinned to the primary can render from a replica that has not caught up
+yet and cache that page under the new version. Each committed bump is
+therefore repeated REPLICA_PIN_SECONDS later, by when the replica is
+expected to have caught up; see _bump_later().
+
+A version that was evicted starts again from the current time, never
+from a value an older entry could still be stored under.
+
+The versions only invalidate what shares their cache. With local memory
+(the default cache profile) that is one process: other workers keep
+serving their pages and 304s for up to DASHBOARD_CACHE_TIMEOUT. Run more
+than one worker process only with a shared cache (the production
+profile).
+"""
+import heapq
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+STUDENT = 'student'
+TEACHER = 'teacher'
+COMMITTEE = 'committee'
+COMMITTEE_ALL = 'all'
+
+logger = logging.getLogger(__name__)
+
+
+def _cache():
+    return caches[settings.DASHBOARD_CACHE]
+
+
+def _version_key(kind, ident):
+    return f'dash-version:{kind}:{ident}'
+
+
+def _page_key(kind, ident, version):
+    return f'dash:{kind}:{ident}:{version}'
+
+
+def _fresh_version():
+    return time.time_ns() // 1000
+
+
+def version(kind, ident):
+    cache = _cache()
+    key = _version_key(kind, ident)
+    value = cache.get(key)
+    if value is None:
+        value = _fresh_version()
+        if not cache.add(key, value, timeout=None):
+            value = cache.get(key, value)
+    return value
+
+
+def versions(kind, idents):
+    """version() for many idents with one cache read for the ones present."""
+    keys = {_version_key(kind, ident): ident for ident in idents}
+    found = {keys[key]: value for key, value in _cache().get_many(list(keys)).items()}
+    return {ident: found[ident] if ident in found else version(kind, ident) for ident in keys.values()}
+
+
+async def aversion(kind, ident):
+    """Async version of version()."""
+    cache = _cache()
+    key = _version_key(kind, ident)
+    value = await cache.aget(key)
+    if value is None:
+        value = _fresh_version()
+        if not await cache.aadd(key, value, timeout=None):
+            value = await cache.aget(key, value)
+    return value
+
+
+async def aversions(kind, idents):
+    """Async version of versions()."""
+    keys = {_version_key(kind, ident): ident for ident in idents}
+    found = {keys[key]: value for key, value in (await _cache().aget_many(list(keys))).items()}
+    return {ident: found[ident] if ident in found else await aversion(kind, ident) for ident in keys.values()}
+
+
+def _bump(kind, ident):
+    cache = _cache()
+    key = _version_key(kind, ident)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+_late = []  # heap of (due, kind, ident)
+_late_ready = threading.Condition()
+_late_worker = None
+
+
+def _run_late_bumps():
+    while True:
+        with _late_ready:
+            while not _late or _late[0][0] > time.monotonic():
+                _late_ready.wait(_late[0][0] - time.monotonic() if _late else None)
+            _, kind, ident = heapq.heappop(_late)
+        try:
+            _bump(kind, ident)
+        except Exception:
+            logger.exception('Failed to bump the %s dashboard of %s', kind, ident)
+
+
+def _bump_later(kind, ident):
+    """Bump again once a lagging replica has caught up (see the module docstring)."""
+    global _late_worker
+    due = time.monotonic() + settings.REPLICA_PIN_SECONDS
+    with _late_ready:
+        heapq.heappush(_late, (due, kind, ident))
+        if _late_worker is None:
+            _late_worker = threading.Thread(target=_run_late_bumps, name='dashboard-bumps', daemon=True)
+            _late_worker.start()
+        _late_ready.notify()
+
+
+def _bump_committed(kind, ident):
+    _bump(kind, ident)
+    if settings.REPLICA_DATABASE and settings.REPLICA_PIN_SECONDS:
+        _bump_later(kind, ident)
+
+
+def bump(kind, ident):
+    if ident is None:
+        return
+    _bump(kind, ident)
+    transaction.on_commit(lambda: _bump_committed(kind, ident))
+
+
+def cases_changed(cases):
+    """Bump the dashboards of every student and teacher ``cases`` belong to, and the committee's."""
+    usns, teachers = set(), set()
+    for case in cases:
+        if isinstance(case, dict):
+            usns.add(case['usn'])
+            teachers.add(case['created_by_id'])
+        else:
+            usns.add(case.usn)
+            teachers.add(case.created_by_id)
+    for usn in usns:
+        bump(STUDENT, usn)
+    for user_id in teachers:
+        bump(TEACHER, user_id)
+    if usns:
+        bump(COMMITTEE, COMMITTEE_ALL)
+
+
+def get_page(kind, ident, version):
+    return _cache().get(_page_key(kind, ident, version))
+
+
+def set_page(kind, ident, version, content):
+    _cache().set(_page_key(kind, ident, version), content, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+
+
+def _page_keys(kind, versions):
+    return {_page_key(kind, ident, v): ident for ident, v in versions.items()}
+
+
+def get_pages(kind, versions):
+    """get_page() for ``{ident: version}``; returns ``{ident: content}`` for the hits."""
+    keys = _page_keys(kind, versions)
+    return {keys[key]: content for key, content in _cache().get_many(list(keys)).items()}
+
+
+def set_pages(kind, versions, contents):
+    _cache().set_many(
+        {_page_key(kind, ident, versions[ident]): content for ident, content in contents.items()},
+        timeout=settings.DASHBOARD_CACHE_TIMEOUT,
+    )
+
+
+async def aget_pages(kind, versions):
+    keys = _page_keys(kind, versions)
+    return {keys[key]: content for key, content in (await _cache().aget_many(list(keys))).items()}
+
+
+async def aset_pages(kind, versions, contents):
+    await _cache().aset_many(
+        {_page_key(kind, ident, versions[ident]): content for ident, content in contents.items()},
+        timeout=settings.DASHBOARD_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,61 @@
+"""Retrying writes that hit SQLite's "database is locked".
+
+SQLite allows one writer at a time. The production profile in settings
+(DCOMM_DB_PROFILE=production) already waits up to OPTIONS['timeout']
+seconds for the lock and starts transactions with BEGIN IMMEDIATE, so
+most contention is absorbed by the busy handler. retry_on_locked covers
+what is left: the whole call is retried with exponential backoff and
+jitter, DB_LOCK_RETRIES times, before the error is raised.
+"""
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+logger = logging.getLogger(__name__)
+
+LOCK_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def is_lock_error(exc):
+    return any(message in str(exc).lower() for message in LOCK_MESSAGES)
+
+
+def backoff_delays(retries, base):
+    """Sleep times for each retry: base, 2*base, 4*base, ... with +-50% jitter."""
+    for attempt in range(retries):
+        yield base * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def call_with_retry(func, *args, retries=None, base_delay=None, **kwargs):
+    retries = settings.DB_LOCK_RETRIES if retries is None else retries
+    base_delay = settings.DB_LOCK_BACKOFF if base_delay is None else base_delay
+    delays = backoff_delays(retries, base_delay)
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except OperationalError as exc:
+            # inside an outer atomic block the transaction is already
+            # broken; only the owner of the outermost block can retry
+            if not is_lock_error(exc) or connection.in_atomic_block:
+                raise
+            delay = next(delays, None)
+            if delay is None:
+                raise
+            logger.warning('Database locked in %s, retrying in %.3fs', getattr(func, '__name__', func), delay)
+            time.sleep(delay)
+
+
+def retry_on_locked(func):
+    """Decorator form of call_with_retry for views and helpers that write.
+
+    The wrapped function is re-run from the start, so it must not have
+    side effects before its write commits.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return call_with_retry(func, *args, **kwargs)
+    return wrapper
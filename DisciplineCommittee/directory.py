@@ -0,0 +1,123 @@
+"""In-process student directory keyed by USN.
+
+The case forms look a student up on every USN entry and again on submit,
+so recently used students are kept in a small LRU. Entries are dropped by
+the Student post_save/post_delete signals (see signals.py) and expire
+after STUDENT_DIRECTORY_TTL seconds so other worker processes, which do
+not see this process's signals, converge as well.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Student
+
+DIRECTORY_FIELDS = ("id", "usn", "name", "email", "department", "year")
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with a per-entry time to live."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_students = LRUCache(
+    maxsize=getattr(settings, "STUDENT_DIRECTORY_SIZE", 5000),
+    ttl=getattr(settings, "STUDENT_DIRECTORY_TTL", 300),
+)
+
+
+def get_student(usn):
+    """Return the directory record (a dict) for ``usn``, or None."""
+    if not usn:
+        return None
+    return get_students([usn]).get(usn)
+
+
+def get_students(usns):
+    """Resolve many USNs at once; misses are fetched in a single query.
+
+    Returns ``{usn: record}`` for the USNs that exist.
+    """
+    found, missing = _lookup(usns)
+    if missing:
+        for record in Student.objects.filter(usn__in=missing).values(*DIRECTORY_FIELDS):
+            _store(record, found)
+    return found
+
+
+async def aget_student(usn):
+    """Async version of get_student()."""
+    if not usn:
+        return None
+    return (await aget_students([usn])).get(usn)
+
+
+async def aget_students(usns):
+    """Async version of get_students()."""
+    found, missing = _lookup(usns)
+    if missing:
+        async for record in Student.objects.filter(usn__in=missing).values(*DIRECTORY_FIELDS):
+            _store(record, found)
+    return found
+
+
+def _lookup(usns):
+    found = {}
+    missing = []
+    for usn in dict.fromkeys(usns):
+        record = _students.get(usn)
+        if record is None:
+            missing.append(usn)
+        else:
+            found[usn] = record
+    return found, missing
+
+
+def _store(record, found):
+    _students.set(record["usn"], record)
+    found[record["usn"]] = record
+
+
+def invalidate(usn):
+    _students.delete(usn)
+
+
+def clear():
+    _students.clear()
@@ -0,0 +1,116 @@
+"""In-process fan-out of "new case" notifications to student event streams.
+
+Each open stream subscribes with an asyncio.Queue for its USN and is fed
+ready-made case payloads, so the stream itself never touches the
+database. Case writes call notify_new_cases(), which publishes the new
+cases once the transaction commits.
+
+Cases filed through another worker process never reach this one's
+notify_new_cases(). For those, one poller per process (not per stream)
+looks for new cases of every subscribed USN each
+STUDENT_EVENTS_HEARTBEAT seconds, on the shared default executor rather
+than a request's own thread. A stream may be sent the same case by both;
+it skips the ids it has already sent.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Max
+
+EVENT_FIELDS = ('id', 'case_type', 'date', 'description')
+
+_subscribers = defaultdict(set)
+_lock = threading.Lock()
+_poller = None
+_floor = None  # lowest last_id subscribed since the poller's last pass
+
+
+def subscribe(usn, last_id):
+    """Queue for the cases of ``usn`` with an id above ``last_id``."""
+    global _floor
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    with _lock:
+        _subscribers[usn].add((loop, queue))
+        _floor = last_id if _floor is None else min(_floor, last_id)
+    _start_poller(loop)
+    return queue
+
+
+def unsubscribe(usn, queue):
+    with _lock:
+        streams = _subscribers.get(usn)
+        if not streams:
+            return
+        streams.difference_update({s for s in streams if s[1] is queue})
+        if not streams:
+            del _subscribers[usn]
+
+
+def publish(usn, cases):
+    """Send ``cases`` (payload dicts) to every stream for ``usn``. Safe to call from any thread."""
+    with _lock:
+        streams = list(_subscribers.get(usn, ()))
+    for loop, queue in streams:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, cases)
+        except RuntimeError:
+            # the stream's event loop has shut down
+            unsubscribe(usn, queue)
+
+
+def case_payload(case):
+    return {field: getattr(case, field) for field in EVENT_FIELDS}
+
+
+def notify_new_cases(cases):
+    """Publish ``cases`` to their students' streams once the write commits."""
+    by_usn = defaultdict(list)
+    for case in cases:
+        if case.pk is not None:
+            by_usn[case.usn].append(case_payload(case))
+    transaction.on_commit(lambda: [publish(usn, payloads) for usn, payloads in by_usn.items()])
+
+
+def _start_poller(loop):
+    global _poller
+    if _poller is None or _poller.done() or _poller.get_loop() is not loop:
+        _poller = loop.create_task(_poll())
+
+
+def _new_cases(after, usns):
+    from .models import Case
+
+    try:
+        latest = Case.objects.aggregate(latest=Max('id'))['latest'] or after
+        rows = list(
+            Case.objects.filter(id__gt=after, id__lte=latest, usn__in=usns)
+            .order_by('id').values('usn', *EVENT_FIELDS)
+        )
+    finally:
+        # this runs on a pool thread, outside any request
+        close_old_connections()
+    return latest, rows
+
+
+async def _poll():
+    global _floor
+    watermark = None
+    while True:
+        await asyncio.sleep(settings.STUDENT_EVENTS_HEARTBEAT)
+        with _lock:
+            usns = list(_subscribers)
+            if not usns:
+                return
+            floor, _floor = _floor, None
+        after = min(x for x in (watermark, floor) if x is not None)
+        watermark, rows = await sync_to_async(_new_cases, thread_sensitive=False)(after, usns)
+        by_usn = defaultdict(list)
+        for row in rows:
+            by_usn[row.pop('usn')].append(row)
+        for usn, payloads in by_usn.items():
+            publish(usn, payloads)
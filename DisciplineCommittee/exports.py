@@ -0,0 +1,76 @@
+"""Streaming CSV / NDJSON serialisation of cases for exports."""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("usn", "usn"),
+    ("student_name", "student_name"),
+    ("year", "year"),
+    ("department", "department"),
+    ("case_type", "case_type"),
+    ("date", "date"),
+    ("description", "description"),
+    ("created_by", "created_by__username"),
+    ("created_at", "created_at"),
+)
+EXPORT_HEADER = [name for name, _ in EXPORT_COLUMNS]
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Rows are joined into one string per chunk so the response is written in
+# a few large pieces instead of one tiny write per row.
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Iterate tuples of export values without caching model instances."""
+    return (
+        queryset.order_by("id")
+        .values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _chunked(lines, chunk_size):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_csv(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    yield from _chunked((writer.writerow(row) for row in rows), chunk_size)
+
+
+def iter_ndjson(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    lines = (
+        json.dumps(dict(zip(EXPORT_HEADER, row)), cls=DjangoJSONEncoder) + "\n"
+        for row in rows
+    )
+    yield from _chunked(lines, chunk_size)
+
+
+def iter_export(queryset, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the serialised export of ``queryset`` in ``fmt`` (csv or ndjson)."""
+    rows = export_rows(queryset, chunk_size)
+    if fmt == "ndjson":
+        return iter_ndjson(rows, chunk_size)
+    return iter_csv(rows, chunk_size)
@@ -0,0 +1,39 @@
+"""Query-string filters shared by the case list, export and API views."""
+from django.utils.dateparse import parse_date
+
+CASE_FILTER_FIELDS = ("case_type", "department", "year", "date_from", "date_to")
+
+
+def _parse_date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"{name} must be a YYYY-MM-DD date")
+    return parsed
+
+
+def filter_cases(queryset, params):
+    """Narrow a Case queryset by case_type, department, year and date range.
+
+    ``params`` is a QueryDict or plain dict; empty values are ignored.
+    Raises ValueError for malformed dates.
+    """
+    for field in ("case_type", "department", "year"):
+        value = (params.get(field) or "").strip()
+        if value:
+            queryset = queryset.filter(**{field: value})
+
+    date_from = _parse_date_param(params, "date_from")
+    date_to = _parse_date_param(params, "date_to")
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    return queryset
+
+
+def active_filters(params):
+    """The subset of ``params`` that are case filters with a value."""
+    return {name: params.get(name) for name in CASE_FILTER_FIELDS if params.get(name)}
@@ -0,0 +1,193 @@
+"""Shared path for filing cases from the forms and the batch API.
+
+ingest_cases() validates every item first, resolves all students with
+one directory lookup, then inserts the valid cases with a single
+bulk_create inside one transaction. bulk_create skips Case.save() and
+its signals, so the counters and student event streams are updated
+here, in the same transaction, like the importer does.
+
+Department and year are taken from the directory; for a USN that is not
+in it the item's values are accepted only if they are already known
+labels (codes.py), so clients cannot grow the Code table.
+
+Items may carry a ``client_key`` (the offline queue in forms.js sends a
+UUID per report). Keys already on file are found with one indexed query
+and reported as duplicates, so a sync retried after a lost response
+files nothing twice; the unique index on Case.client_key backs this up
+when two syncs of the same report race.
+"""
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_date
+
+from . import codes, directory, events
+from .counters import apply_case_delta
+from .models import Case
+
+CASE_TYPES = {value for value, _ in Case.CASE_TYPES}
+MAX_BATCH_CASES = 500
+
+# Case field -> (directory field, item keys accepted for it). The directory
+# record wins over what the client sends; the item covers unknown USNs.
+STUDENT_FIELDS = {
+    "student_name": ("name", ("student_name", "name")),
+    "year": ("year", ("year",)),
+    "department": ("department", ("department",)),
+}
+
+
+class CaseError(ValueError):
+
+    def __init__(self, errors):
+        super().__init__("; ".join(f"{field}: {message}" for field, message in errors.items()))
+        self.errors = errors
+
+
+def _text(data, name):
+    value = data.get(name)
+    return str(value).strip() if value is not None else ""
+
+
+def _max_length(name):
+    field = Case._meta.get_field(name)
+    # coded fields (codes.py) store an integer but accept labels this long
+    return getattr(field, "label_length", field.max_length)
+
+
+def _known_label(name, value):
+    kind = getattr(Case._meta.get_field(name), "kind", None)
+    return kind is None or codes.known(kind, value)
+
+
+def build_case(data, teacher, students):
+    """Validate one item and return an unsaved Case, or raise CaseError.
+
+    ``students`` is the {usn: record} mapping from directory.get_students().
+    """
+    if not isinstance(data, dict):
+        raise CaseError({"case": "must be an object"})
+    errors = {}
+
+    usn = _text(data, "usn")
+    if not usn:
+        errors["usn"] = "is required"
+    student = students.get(usn) or {}
+
+    case_type = _text(data, "case_type")
+    if case_type not in CASE_TYPES:
+        errors["case_type"] = f"must be one of {', '.join(sorted(CASE_TYPES))}"
+
+    try:
+        date = parse_date(_text(data, "date")) if _text(data, "date") else None
+    except ValueError:
+        # well formed but not a real day, e.g. 2024-02-30
+        date = None
+    if date is None:
+        errors["date"] = "must be a YYYY-MM-DD date"
+
+    fields = {}
+    for name, (directory_field, keys) in STUDENT_FIELDS.items():
+        value = student.get(directory_field) or next(filter(None, (_text(data, key) for key in keys)), "")
+        if not value:
+            errors[name] = "is required for a USN that is not in the student directory"
+        elif not student.get(directory_field) and not _known_label(name, value):
+            # clients cannot add departments or years; the directory does
+            errors[name] = f"is not a known {name}"
+        fields[name] = value
+    for name, value in [("usn", usn), *fields.items()]:
+        if len(value) > _max_length(name):
+            errors[name] = f"is longer than {_max_length(name)} characters"
+
+    client_key = _text(data, "client_key") or None
+    if client_key and len(client_key) > _max_length("client_key"):
+        errors["client_key"] = f"is longer than {_max_length('client_key')} characters"
+
+    description = _text(data, "description")
+    violations = data.get("violations")
+    if violations:
+        if not isinstance(violations, list):
+            errors["violations"] = "must be a list"
+        else:
+            # the format the uniform violation form has always stored
+            description = "Violations: " + ", ".join(map(str, violations)) + "\nOther: " + description
+
+    if errors:
+        raise CaseError(errors)
+    return Case(
+        usn=usn,
+        case_type=case_type,
+        date=date,
+        description=description,
+        student_id=student.get("id"),
+        created_by=teacher,
+        client_key=client_key,
+        **fields,
+    )
+
+
+def _insert(pending):
+    """Insert the valid ``pending`` results, skipping client keys on file.
+
+    A key repeated within the batch points at the first case carrying it.
+    """
+    keys = {result["case"].client_key for result in pending} - {None}
+    with transaction.atomic():
+        existing = dict(Case.objects.filter(client_key__in=keys).values_list("client_key", "id")) if keys else {}
+        first = {}
+        cases = []
+        for result in pending:
+            key = result["case"].client_key
+            result.pop("id", None)
+            result.pop("first", None)
+            if key in existing:
+                result.update(status="duplicate", id=existing[key])
+            elif key in first:
+                result.update(status="duplicate", first=first[key])
+            else:
+                result["status"] = "created"
+                if key is not None:
+                    first[key] = result["case"]
+                cases.append(result["case"])
+        if cases:
+            Case.objects.bulk_create(cases)
+            apply_case_delta(cases, +1)
+            events.notify_new_cases(cases)
+
+
+def ingest_cases(items, teacher):
+    """File ``items`` (dicts) for ``teacher``; invalid items are skipped.
+
+    Returns one result per item, in order: ``{"index", "status": "created",
+    "id"}``, ``{"index", "status": "duplicate", "id"}`` for a client key
+    that is already on file, or ``{"index", "status": "invalid", "errors"}``.
+    """
+    usns = [_text(item, "usn") for item in items if isinstance(item, dict)]
+    students = directory.get_students([usn for usn in usns if usn])
+
+    results = []
+    pending = []
+    for index, item in enumerate(items):
+        try:
+            case = build_case(item, teacher, students)
+        except CaseError as e:
+            results.append({"index": index, "status": "invalid", "errors": e.errors})
+            continue
+        result = {"index": index, "status": "created", "case": case}
+        results.append(result)
+        pending.append(result)
+
+    if pending:
+        try:
+            _insert(pending)
+        except IntegrityError:
+            # a concurrent sync filed one of the keys after our lookup;
+            # looking again finds it and reports it as a duplicate
+            _insert(pending)
+
+    for result in results:
+        case = result.pop("case", None)
+        first = result.pop("first", None)
+        if first is not None:
+            result["id"] = first.pk
+        elif result["status"] == "created":
+            result["id"] = case.pk
+    return results
@@ -0,0 +1,140 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+DEFAULT_PATHS = ['/api/get-student/?usn=1AB21CS001']
+
+
+class Command(BaseCommand):
+    help = ('Measure requests/sec of the JSON API at high concurrency. Start the '
+            'portal under both servers, e.g. "gunicorn DCOMM.wsgi -w 4 -b :8000" and '
+            '"uvicorn DCOMM.asgi:application --workers 4 --port 8001", then run '
+            '--target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True,
+                            help='label=base URL of a running server; repeat to compare servers')
+        parser.add_argument('--path', action='append',
+                            help='Path to request, cycled across requests; repeatable '
+                                 f'(default: {DEFAULT_PATHS[0]})')
+        parser.add_argument('--concurrency', type=int, default=200,
+                            help='Simultaneous keep-alive connections (default: 200)')
+        parser.add_argument('--requests', type=int, default=5000,
+                            help='Requests per target (default: 5000)')
+        parser.add_argument('--cookie', help='Cookie header to send, e.g. sessionid=...')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--concurrency and --requests must be positive')
+        paths = options['path'] or DEFAULT_PATHS
+
+        for target in options['target']:
+            label, sep, url = target.partition('=')
+            if not sep:
+                label = url = target
+            parts = urlsplit(url)
+            if parts.scheme != 'http' or not parts.hostname:
+                raise CommandError(f'{target!r}: only http://host:port URLs are supported')
+
+            result = asyncio.run(self._run(
+                parts.hostname, parts.port or 80, paths,
+                options['concurrency'], options['requests'], options['cookie'],
+            ))
+            self._report(label, result)
+
+    async def _run(self, host, port, paths, concurrency, total, cookie):
+        latencies = []
+        errors = 0
+        issued = 0
+
+        async def worker():
+            nonlocal errors, issued
+            reader = writer = None
+            while issued < total:
+                path = paths[issued % len(paths)]
+                issued += 1
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(host, port)
+                    started = time.perf_counter()
+                    status, keep_alive = await _request(reader, writer, host, path, cookie)
+                    if status >= 400:
+                        errors += 1
+                    else:
+                        latencies.append(time.perf_counter() - started)
+                    if not keep_alive:
+                        writer.close()
+                        reader = writer = None
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    errors += 1
+                    if writer is not None:
+                        writer.close()
+                    reader = writer = None
+            if writer is not None:
+                writer.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+        return latencies, errors, time.perf_counter() - started
+
+    def _report(self, label, result):
+        latencies, errors, elapsed = result
+        if not latencies:
+            self.stdout.write(self.style.ERROR(f'{label}: no successful requests ({errors} errors)'))
+            return
+        latencies.sort()
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {len(latencies) / elapsed:,.0f} req/s, {len(latencies)} ok, {errors} errors, '
+            f'latency ms p50 {statistics.median(latencies) * 1000:.1f} '
+            f'p95 {pct(0.95):.1f} p99 {pct(0.99):.1f}'
+        ))
+
+
+async def _request(reader, writer, host, path, cookie):
+    """Send one GET on a keep-alive connection; return (status, keep_alive)."""
+    headers = [f'GET {path} HTTP/1.1', f'Host: {host}', 'Connection: keep-alive']
+    if cookie:
+        headers.append(f'Cookie: {cookie}')
+    writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode())
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise asyncio.IncompleteReadError(b'', None)
+    status = int(status_line.split()[1])
+    length = None
+    chunked = False
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding':
+            chunked = 'chunked' in value
+        elif name == 'connection':
+            keep_alive = value != 'close'
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        keep_alive = False
+    return status, keep_alive
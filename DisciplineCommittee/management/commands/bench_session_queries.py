@@ -0,0 +1,78 @@
+import contextlib
+import io
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from DisciplineCommittee.models import Student
+
+SESSION_TABLE = 'django_session'
+LOCAL_CACHE = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-sessions'}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Count database queries per authenticated dashboard request under each session mode. '
+            'Runs against the configured database inside a transaction that is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Dashboard requests per mode and user type (default: 50)')
+        parser.add_argument('--mode', action='append', choices=sorted(settings.SESSION_ENGINES),
+                            help='Only these session modes (default: all)')
+
+    def handle(self, *args, **options):
+        modes = options['mode'] or list(settings.SESSION_ENGINES)
+        caches = {**settings.CACHES, 'sessions': LOCAL_CACHE}
+        for mode in modes:
+            with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[mode], CACHES=caches):
+                for label, result in self._run(options['requests']):
+                    queries, session_queries, elapsed = result
+                    n = options['requests']
+                    self.stdout.write(
+                        f'{mode:>14} {label}: {queries / n:.1f} queries/request '
+                        f'({session_queries / n:.1f} on {SESSION_TABLE}), {elapsed / n * 1000:.1f}ms/request'
+                    )
+
+    def _run(self, requests):
+        results = []
+        try:
+            with transaction.atomic():
+                student = Student.objects.create(
+                    usn='BENCH0000001', name='Bench Student', email='bench@example.com',
+                    department='CSE', year='1', password='bench',
+                )
+                teacher = User.objects.create_user(username='bench-teacher', email='bench-teacher@example.com')
+
+                # a new Client per mode: SessionMiddleware binds its engine at start-up
+                client = Client()
+                with contextlib.redirect_stdout(io.StringIO()):  # student_login prints debug output
+                    client.post(reverse('student_login'), {'usn': student.usn, 'password': 'bench'})
+                results.append(('student dashboard', self._measure(client, 'student_dashboard', requests)))
+
+                client = Client()
+                client.force_login(teacher)
+                results.append(('teacher dashboard', self._measure(client, 'teacher_dashboard', requests)))
+                raise _Rollback
+        except _Rollback:
+            pass
+        return results
+
+    def _measure(self, client, url_name, requests):
+        url = reverse(url_name)
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get(url)
+            elapsed = time.perf_counter() - started
+        session_queries = sum(SESSION_TABLE in q['sql'] for q in captured.captured_queries)
+        return len(captured.captured_queries), session_queries, elapsed
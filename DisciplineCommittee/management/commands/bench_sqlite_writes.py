@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from DisciplineCommittee.db import backoff_delays, is_lock_error
+
+
+SCHEMA = """
+CREATE TABLE cases (id INTEGER PRIMARY KEY, usn TEXT, case_type TEXT, description TEXT, created_by INTEGER);
+CREATE INDEX cases_usn ON cases (usn);
+CREATE TABLE stats (teacher INTEGER PRIMARY KEY, total INTEGER NOT NULL DEFAULT 0);
+"""
+
+
+class Profile:
+
+    def __init__(self, name, timeout, begin, pragmas):
+        self.name = name
+        self.timeout = timeout
+        self.begin = begin
+        self.pragmas = pragmas
+
+    def connect(self, path):
+        conn = sqlite3.connect(path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        for key, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {key}={value}')
+        return conn
+
+
+def _profiles(timeout):
+    return [
+        # what settings.DATABASES used before: rollback journal, deferred BEGIN
+        Profile('default', timeout, 'BEGIN', {}),
+        Profile('production', timeout, 'BEGIN IMMEDIATE', settings.SQLITE_PRODUCTION_PRAGMAS),
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Compare write throughput of the default and production SQLite profiles '
+            'with concurrent case submissions (plus dashboard readers) on a scratch database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Concurrent writer threads (default: 8)')
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads (default: 4)')
+        parser.add_argument('--transactions', type=int, default=200,
+                            help='Case submissions per writer (default: 200)')
+        parser.add_argument('--timeout', type=float, default=1.0,
+                            help='Busy timeout in seconds for both profiles (default: 1)')
+        parser.add_argument('--retries', type=int, default=settings.DB_LOCK_RETRIES,
+                            help='Lock retries per submission (default: DB_LOCK_RETRIES)')
+        parser.add_argument('--profile', choices=['default', 'production'], action='append',
+                            help='Only run these profiles (default: both)')
+
+    def handle(self, *args, **options):
+        if options['writers'] < 1 or options['transactions'] < 1:
+            raise CommandError('--writers and --transactions must be positive')
+        for profile in _profiles(options['timeout']):
+            if options['profile'] and profile.name not in options['profile']:
+                continue
+            with tempfile.TemporaryDirectory() as tmp:
+                result = self._run(profile, os.path.join(tmp, 'bench.sqlite3'), options)
+            committed, failed, retries, reads, elapsed = result
+            self.stdout.write(self.style.SUCCESS(
+                f'{profile.name}: {committed / elapsed:,.0f} writes/s, {committed} committed, '
+                f'{failed} failed, {retries} retries, {reads / elapsed:,.0f} reads/s'
+            ))
+
+    def _run(self, profile, path, options):
+        setup = profile.connect(path)
+        setup.executescript(SCHEMA)
+        setup.executemany('INSERT INTO stats (teacher) VALUES (?)', [(t,) for t in range(options['writers'])])
+        setup.close()
+
+        totals = {'committed': 0, 'failed': 0, 'retries': 0, 'reads': 0}
+        lock = threading.Lock()
+        writers_done = threading.Event()
+
+        def add(key, n=1):
+            with lock:
+                totals[key] += n
+
+        def submit(conn, teacher, n):
+            # the shape of a case save: look the student up, insert, bump counters
+            usn = f'1AB21CS{n % 500:03d}'
+            conn.execute(profile.begin)
+            try:
+                conn.execute('SELECT COUNT(*) FROM cases WHERE usn = ?', (usn,)).fetchone()
+                conn.execute(
+                    'INSERT INTO cases (usn, case_type, description, created_by) VALUES (?, ?, ?, ?)',
+                    (usn, 'Late Arrival', 'x' * 200, teacher),
+                )
+                conn.execute('UPDATE stats SET total = total + 1 WHERE teacher = ?', (teacher,))
+                conn.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+
+        def writer(teacher):
+            conn = profile.connect(path)
+            for n in range(options['transactions']):
+                delays = backoff_delays(options['retries'], settings.DB_LOCK_BACKOFF)
+                while True:
+                    try:
+                        submit(conn, teacher, n)
+                        add('committed')
+                        break
+                    except sqlite3.OperationalError as exc:
+                        delay = next(delays, None) if is_lock_error(exc) else None
+                        if delay is None:
+                            add('failed')
+                            break
+                        add('retries')
+                        time.sleep(delay)
+            conn.close()
+
+        def reader():
+            conn = profile.connect(path)
+            while not writers_done.is_set():
+                try:
+                    conn.execute('SELECT usn, case_type FROM cases ORDER BY id DESC LIMIT 20').fetchall()
+                    add('reads')
+                except sqlite3.OperationalError:
+                    time.sleep(0.001)
+            conn.close()
+
+        readers = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        writers = [threading.Thread(target=writer, args=(t,)) for t in range(options['writers'])]
+        started = time.perf_counter()
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        writers_done.set()
+        for thread in readers:
+            thread.join()
+        return totals['committed'], totals['failed'], totals['retries'], totals['reads'], elapsed
@@ -1,11 +1,130 @@
-from django.core.management.base import BaseCommand
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_date
+
+from DisciplineCommittee.counters import COUNTED_FIELDS, apply_case_delta
 from DisciplineCommittee.models import Case
 
+
+CASE_TYPES = {value for value, _ in Case.CASE_TYPES}
+DEFAULT_CHECKPOINT = '.clear_complaints.json'
+
+
 class Command(BaseCommand):
-    help = 'Remove all complaints/cases from the database'
+    help = 'Remove complaints/cases in short primary-key chunks (all of them unless filtered)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='Only cases whose date is before YYYY-MM-DD')
+        parser.add_argument('--department', help='Only cases from this department')
+        parser.add_argument('--case-type', choices=sorted(CASE_TYPES), help='Only cases of this type')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Cases deleted per transaction (default: 1000)')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between chunks so the portal can write (default: 0)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the cases that would be deleted')
+        parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                            help=f'Progress file used by --resume (default: {DEFAULT_CHECKPOINT})')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue an interrupted run from its checkpoint')
 
     def handle(self, *args, **options):
-        count, _ = Case.objects.all().delete()
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully deleted {count} complaint(s)')
-        )
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+        filters = self._filters(options)
+        cases = Case.objects.filter(**filters)
+
+        if options['dry_run']:
+            count = cases.count()
+            self.stdout.write(self.style.SUCCESS(f'{count} complaint(s) would be deleted'))
+            return
+
+        checkpoint = options['checkpoint']
+        if options['resume']:
+            last_id, upper = self._load_checkpoint(checkpoint, filters)
+        else:
+            # cases created while we run are never touched
+            last_id, upper = 0, cases.aggregate(upper=Max('id'))['upper'] or 0
+
+        deleted, elapsed = self._delete(cases, filters, last_id, upper, options, checkpoint)
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        rate = deleted / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully deleted {deleted} complaint(s) in {elapsed:.1f}s ({rate:,.0f} rows/s)'
+        ))
+
+    def _filters(self, options):
+        filters = {}
+        if options['before']:
+            before = parse_date(options['before'])
+            if before is None:
+                raise CommandError('--before must be a YYYY-MM-DD date')
+            filters['date__lt'] = before
+        if options['department']:
+            filters['department'] = options['department']
+        if options['case_type']:
+            filters['case_type'] = options['case_type']
+        return filters
+
+    def _load_checkpoint(self, path, filters):
+        try:
+            with open(path, encoding='utf-8') as handle:
+                state = json.load(handle)
+        except FileNotFoundError:
+            raise CommandError(f'No checkpoint at {path}; nothing to resume')
+        if state['filters'] != {key: str(value) for key, value in filters.items()}:
+            raise CommandError('The checkpoint was written with different filters')
+        return state['last_id'], state['upper']
+
+    def _save_checkpoint(self, path, filters, last_id, upper):
+        state = {
+            'filters': {key: str(value) for key, value in filters.items()},
+            'last_id': last_id,
+            'upper': upper,
+        }
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(state, handle)
+
+    def _delete(self, cases, filters, last_id, upper, options, checkpoint):
+        chunk_size = options['chunk_size']
+        deleted = 0
+        started = time.monotonic()
+
+        while last_id < upper:
+            with transaction.atomic():
+                rows = list(
+                    cases.filter(id__gt=last_id, id__lte=upper)
+                    .order_by('id')
+                    .values('id', *COUNTED_FIELDS)[:chunk_size]
+                )
+                if not rows:
+                    break
+                deleted += self._delete_rows([row['id'] for row in rows])
+                apply_case_delta(rows, -1)
+
+            last_id = rows[-1]['id']
+            self._save_checkpoint(checkpoint, filters, last_id, upper)
+            elapsed = time.monotonic() - started
+            self.stdout.write(f'{deleted} rows ({deleted / elapsed:,.0f} rows/s), up to id {last_id}')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        return deleted, time.monotonic() - started
+
+    def _delete_rows(self, ids):
+        # A plain DELETE. QuerySet.delete() would collect every row and send
+        # the post_delete signal per case, which moves the counters one case
+        # at a time; here they move once per chunk, in the same transaction,
+        # and nothing cascades to Case.
+        table = connection.ops.quote_name(Case._meta.db_table)
+        placeholders = ', '.join(['%s'] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE id IN ({placeholders})', ids)
+            return cursor.rowcount
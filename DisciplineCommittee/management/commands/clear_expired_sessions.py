@@ -0,0 +1,43 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Delete expired rows from django_session in small batches '
+            '(the db and cached_db session modes; the others keep no rows)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Sessions deleted per statement (default: 1000)')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between batches (default: 0)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        # rows expiring while we run are left for the next run
+        now = timezone.now()
+        deleted = 0
+        started = time.monotonic()
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+            # each delete is its own short autocommit transaction; nothing
+            # cascades to Session, so this is a single DELETE statement
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired session(s) in {elapsed:.1f}s'
+        ))
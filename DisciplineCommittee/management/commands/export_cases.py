@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from DisciplineCommittee.exports import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, iter_export
+from DisciplineCommittee.filters import filter_cases
+from DisciplineCommittee.models import Case
+
+
+class Command(BaseCommand):
+    help = 'Stream cases to CSV or NDJSON, optionally filtered'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--case-type')
+        parser.add_argument('--department')
+        parser.add_argument('--year')
+        parser.add_argument('--date-from', help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--date-to', help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help=f'Rows fetched per query round trip (default: {DEFAULT_CHUNK_SIZE})')
+
+    def handle(self, *args, **options):
+        try:
+            cases = filter_cases(Case.objects.all(), options)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        chunks = iter_export(cases, options['format'], options['chunk_size'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+            for chunk in chunks:
+                out.write(chunk)
@@ -0,0 +1,212 @@
+import csv
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from DisciplineCommittee.counters import apply_case_delta
+from DisciplineCommittee.models import Case, Student, UniformViolation
+
+
+CASE_TYPES = {value for value, _ in Case.CASE_TYPES}
+
+
+class RowError(ValueError):
+    pass
+
+
+def _text(row, name, model, required=True):
+    value = (row.get(name) or "").strip()
+    if required and not value:
+        raise RowError(f"{name} is required")
+    field = model._meta.get_field(name)
+    max_length = getattr(field, 'label_length', field.max_length)
+    if max_length and len(value) > max_length:
+        raise RowError(f"{name} is longer than {max_length} characters")
+    return value
+
+
+def _date(row, name="date"):
+    try:
+        value = parse_date((row.get(name) or "").strip())
+    except ValueError:
+        # well formed but not a real day, e.g. 2024-02-30
+        value = None
+    if value is None:
+        raise RowError(f"{name} must be a YYYY-MM-DD date")
+    return value
+
+
+def _created_at(row, date):
+    """Keep historical ordering: use created_at if given, else the case date."""
+    raw = (row.get("created_at") or "").strip()
+    try:
+        value = parse_datetime(raw) if raw else datetime.combine(date, dt_time.min)
+    except ValueError:
+        value = None
+    if value is None:
+        raise RowError("created_at must be an ISO datetime")
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+@contextmanager
+def historical_timestamps(model):
+    # bulk_create would otherwise stamp every imported row with "now"
+    field = model._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Stream historical cases from a CSV file into Case or UniformViolation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to import, or - for stdin')
+        parser.add_argument('--model', choices=['case', 'uniform'], default='case',
+                            help='Target table (default: case)')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rows per bulk insert / transaction (default: 2000)')
+        parser.add_argument('--default-teacher',
+                            help='Username or email used for rows without created_by')
+        parser.add_argument('--max-errors', type=int, default=100,
+                            help='Abort after this many invalid rows (default: 100)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate the file without writing anything')
+
+    def handle(self, *args, **options):
+        self.model = Case if options['model'] == 'case' else UniformViolation
+        self.batch_size = options['batch_size']
+        self.dry_run = options['dry_run']
+        if self.batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        if self.model is Case:
+            self.teachers = self._load_teachers()
+            self.default_teacher = None
+            if options['default_teacher']:
+                self.default_teacher = self.teachers.get(options['default_teacher'].lower())
+                if self.default_teacher is None:
+                    raise CommandError(f"Unknown teacher {options['default_teacher']!r}")
+
+        path = options['path']
+        handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        try:
+            with historical_timestamps(self.model):
+                imported, rejected, elapsed = self._import(csv.DictReader(handle), options['max_errors'])
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+        rate = imported / elapsed if elapsed else 0
+        verb = 'Validated' if self.dry_run else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {imported} row(s), rejected {rejected}, in {elapsed:.1f}s ({rate:,.0f} rows/s)'
+        ))
+
+    def _load_teachers(self):
+        # username and email both resolve to the user id; one query up front
+        teachers = {}
+        for pk, username, email in User.objects.values_list('id', 'username', 'email').iterator():
+            teachers[username.lower()] = pk
+            if email:
+                teachers.setdefault(email.lower(), pk)
+        return teachers
+
+    def _import(self, reader, max_errors):
+        build = self._build_case if self.model is Case else self._build_violation
+        batch = []
+        imported = rejected = 0
+        started = time.monotonic()
+
+        # line 1 is the header
+        for line, row in enumerate(reader, start=2):
+            try:
+                batch.append(build(row))
+            except RowError as e:
+                rejected += 1
+                self.stderr.write(f'line {line}: {e}')
+                if rejected >= max_errors:
+                    raise CommandError(f'Aborting after {rejected} invalid rows')
+                continue
+
+            if len(batch) >= self.batch_size:
+                imported += self._flush(batch)
+                batch = []
+                self._progress(imported, started)
+
+        if batch:
+            imported += self._flush(batch)
+        return imported, rejected, time.monotonic() - started
+
+    def _flush(self, batch):
+        if not self.dry_run:
+            if self.model is Case:
+                self._link_students(batch)
+            with transaction.atomic():
+                self.model.objects.bulk_create(batch, batch_size=self.batch_size)
+                if self.model is Case:
+                    apply_case_delta(batch, +1)
+        return len(batch)
+
+    def _link_students(self, batch):
+        # one query per batch; unknown USNs keep only the copied fields
+        ids = dict(Student.objects.filter(usn__in={case.usn for case in batch}).values_list('usn', 'id'))
+        for case in batch:
+            case.student_id = ids.get(case.usn)
+
+    def _progress(self, imported, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(f'{imported} rows ({imported / elapsed:,.0f} rows/s)')
+
+    def _build_case(self, row):
+        case_type = (row.get('case_type') or '').strip()
+        if case_type not in CASE_TYPES:
+            raise RowError(f'unknown case_type {case_type!r}')
+
+        creator = (row.get('created_by') or '').strip().lower()
+        created_by_id = self.teachers.get(creator) if creator else self.default_teacher
+        if created_by_id is None:
+            raise RowError(f'unknown created_by {creator!r}' if creator else 'created_by is required')
+
+        date = _date(row)
+        return Case(
+            usn=_text(row, 'usn', Case),
+            student_name=_text(row, 'student_name', Case),
+            year=_text(row, 'year', Case),
+            department=_text(row, 'department', Case),
+            case_type=case_type,
+            date=date,
+            description=(row.get('description') or '').strip(),
+            created_by_id=created_by_id,
+            created_at=_created_at(row, date),
+        )
+
+    def _build_violation(self, row):
+        try:
+            prior_count = int((row.get('prior_count') or '0').strip())
+        except ValueError:
+            raise RowError('prior_count must be a whole number')
+
+        date = _date(row)
+        return UniformViolation(
+            usn=_text(row, 'usn', UniformViolation),
+            name=_text(row, 'name', UniformViolation),
+            year=_text(row, 'year', UniformViolation),
+            department=_text(row, 'department', UniformViolation),
+            date=date,
+            prior_count=prior_count,
+            violations=(row.get('violations') or '').strip(),
+            description=(row.get('description') or '').strip(),
+            created_at=_created_at(row, date),
+        )
@@ -0,0 +1,79 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, Max, OuterRef, Subquery
+
+from DisciplineCommittee.models import Case, Student
+
+
+DEFAULT_CHECKPOINT = '.link_case_students.json'
+
+
+class Command(BaseCommand):
+    help = 'Link existing cases to their Student rows by USN, in short primary-key chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Case ids covered per UPDATE (default: 1000)')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between chunks so the portal can write (default: 0)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the cases that would be linked')
+        parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                            help=f'Progress file used by --resume (default: {DEFAULT_CHECKPOINT})')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue an interrupted run from its checkpoint')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+        student = Student.objects.filter(usn=OuterRef('usn'))
+        unlinked = Case.objects.filter(student__isnull=True).filter(Exists(student))
+
+        if options['dry_run']:
+            count = unlinked.count()
+            self.stdout.write(self.style.SUCCESS(f'{count} case(s) would be linked'))
+            return
+
+        checkpoint = options['checkpoint']
+        if options['resume']:
+            last_id, upper = self._load_checkpoint(checkpoint)
+        else:
+            # new cases are linked when they are filed
+            last_id, upper = 0, Case.objects.aggregate(upper=Max('id'))['upper'] or 0
+
+        chunk_size = options['chunk_size']
+        linked = 0
+        started = time.monotonic()
+        while last_id < upper:
+            end = min(last_id + chunk_size, upper)
+            # one statement per chunk, so the write lock is held briefly
+            linked += unlinked.filter(id__gt=last_id, id__lte=end).update(
+                student_id=Subquery(student.values('id')[:1])
+            )
+            last_id = end
+            self._save_checkpoint(checkpoint, last_id, upper)
+            elapsed = time.monotonic() - started
+            self.stdout.write(f'{linked} linked ({last_id / upper:.0%} of ids), up to id {last_id}, {elapsed:.1f}s')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Linked {linked} case(s) in {time.monotonic() - started:.1f}s'
+        ))
+
+    def _load_checkpoint(self, path):
+        try:
+            with open(path, encoding='utf-8') as handle:
+                state = json.load(handle)
+        except FileNotFoundError:
+            raise CommandError(f'No checkpoint at {path}; nothing to resume')
+        return state['last_id'], state['upper']
+
+    def _save_checkpoint(self, path, last_id, upper):
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump({'last_id': last_id, 'upper': upper}, handle)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from DisciplineCommittee.throttle import login_metrics, reset_metrics
+
+
+class Command(BaseCommand):
+    help = 'Show login attempts, throttled requests and time spent hashing passwords (all workers)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them')
+
+    def handle(self, *args, **options):
+        m = login_metrics()
+        self.stdout.write(
+            f"attempts {m['attempts']} (succeeded {m['succeeded']}, failed {m['failed']}), "
+            f"throttled {m['throttled']}, hashing {m['auth_ms'] / 1000:.1f}s total, "
+            f"{m['avg_auth_ms']:.0f}ms per attempt"
+        )
+        if options['reset']:
+            reset_metrics()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from DisciplineCommittee.activity import prune_history
+
+
+class Command(BaseCommand):
+    help = 'Trim every user\'s Activity history to the latest ACTIVITY_HISTORY_LIMIT entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=None,
+                            help='Activities to keep per user (default: ACTIVITY_HISTORY_LIMIT)')
+        parser.add_argument('--no-archive', action='store_true',
+                            help='Delete pruned rows instead of moving them to ActivityArchive')
+
+    def handle(self, *args, **options):
+        keep = options['keep'] if options['keep'] is not None else settings.ACTIVITY_HISTORY_LIMIT
+        if not keep or keep < 0:
+            raise CommandError('Set ACTIVITY_HISTORY_LIMIT or pass --keep with a positive number')
+        archive = False if options['no_archive'] else settings.ACTIVITY_ARCHIVE
+        removed = prune_history(keep=keep, archive=archive)
+        verb = 'Archived' if archive else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {removed} activit{"y" if removed == 1 else "ies"}'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from DisciplineCommittee.counters import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the department/year/case type/month case counts from the Case table'
+
+    def handle(self, *args, **options):
+        buckets = rebuild_rollups()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt case rollups: {buckets} bucket(s)')
+        )
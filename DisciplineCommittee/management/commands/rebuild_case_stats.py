@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from DisciplineCommittee.counters import rebuild_teacher_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-teacher case counters from the Case table'
+
+    def handle(self, *args, **options):
+        teachers = rebuild_teacher_stats()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt case statistics for {teachers} teacher(s)')
+        )
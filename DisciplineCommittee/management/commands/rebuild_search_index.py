@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from DisciplineCommittee.search import rebuild_indexes, search_available
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search indexes over case descriptions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--optimize', action='store_true',
+                            help='Also merge index segments after rebuilding')
+
+    def handle(self, *args, **options):
+        if not search_available():
+            raise CommandError('Full-text search needs the SQLite FTS5 extension')
+        started = time.monotonic()
+        with transaction.atomic():
+            rebuild_indexes(optimize=options['optimize'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt search indexes in {time.monotonic() - started:.1f}s')
+        )
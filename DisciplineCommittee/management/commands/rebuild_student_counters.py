@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from DisciplineCommittee.counters import rebuild_student_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-student case counts by case type from the Case table'
+
+    def handle(self, *args, **options):
+        counters = rebuild_student_counters()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt student case counts: {counters} counter(s)')
+        )
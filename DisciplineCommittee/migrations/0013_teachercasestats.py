@@ -0,0 +1,71 @@
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+CASE_TYPE_FIELDS = {
+    "Late Arrival": "late_arrival",
+    "Academic Misconduct": "academic_misconduct",
+    "Uniform Violation": "uniform_violation",
+    "Other": "other",
+}
+
+
+def backfill_stats(apps, schema_editor):
+    Case = apps.get_model("DisciplineCommittee", "Case")
+    TeacherCaseStats = apps.get_model("DisciplineCommittee", "TeacherCaseStats")
+
+    per_teacher = defaultdict(Counter)
+    grouped = Case.objects.order_by().values("created_by_id", "case_type").annotate(n=Count("id"))
+    for row in grouped:
+        counts = per_teacher[row["created_by_id"]]
+        counts["total"] += row["n"]
+        field = CASE_TYPE_FIELDS.get(row["case_type"])
+        if field:
+            counts[field] += row["n"]
+
+    TeacherCaseStats.objects.bulk_create(
+        TeacherCaseStats(user_id=user_id, **counts) for user_id, counts in per_teacher.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("DisciplineCommittee", "0011_case_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TeacherCaseStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("total", models.IntegerField(default=0)),
+                ("late_arrival", models.IntegerField(default=0)),
+                ("academic_misconduct", models.IntegerField(default=0)),
+                ("uniform_violation", models.IntegerField(default=0)),
+                ("other", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="case_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
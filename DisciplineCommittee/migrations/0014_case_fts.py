@@ -0,0 +1,71 @@
+"""FTS5 indexes over Case and UniformViolation free text (SQLite only).
+
+Both are external-content tables: the text lives only in the source
+table and the triggers keep the index in step with every insert, update
+and delete, including bulk_create and raw deletes. The update trigger
+only fires when an indexed column changes, so updates to other columns
+(link_case_students setting student_id, say) leave the index alone.
+"""
+from django.db import migrations
+
+FTS_TABLES = [
+    # (fts table, content table, indexed columns)
+    (
+        "DisciplineCommittee_case_fts",
+        "DisciplineCommittee_case",
+        ["student_name", "description"],
+    ),
+    (
+        "DisciplineCommittee_uniformviolation_fts",
+        "DisciplineCommittee_uniformviolation",
+        ["name", "violations", "description"],
+    ),
+]
+
+
+def create_sql(fts, content, columns):
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    old_cols = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f'CREATE VIRTUAL TABLE "{fts}" USING fts5({cols}, '
+        f"content='{content}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{content}" BEGIN '
+        f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new.id, {new_cols}); END',
+        f'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{content}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old.id, {old_cols}); END',
+        f'CREATE TRIGGER "{fts}_au" AFTER UPDATE OF {cols} ON "{content}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old.id, {old_cols}); '
+        f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new.id, {new_cols}); END',
+        f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+    ]
+
+
+def drop_sql(fts, content, columns):
+    return [
+        f'DROP TRIGGER IF EXISTS "{fts}_ai"',
+        f'DROP TRIGGER IF EXISTS "{fts}_ad"',
+        f'DROP TRIGGER IF EXISTS "{fts}_au"',
+        f'DROP TABLE IF EXISTS "{fts}"',
+    ]
+
+
+def _run(builder):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for table in FTS_TABLES:
+            for statement in builder(*table):
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("DisciplineCommittee", "0013_teachercasestats"),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(create_sql), _run(drop_sql)),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # A nullable column and a partial unique index: SQLite can add both in
+    # place, so the case table (and its FTS triggers) is not rebuilt.
+
+    dependencies = [
+        ("DisciplineCommittee", "0015_activity_history"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="case",
+            name="client_key",
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="case",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("client_key__isnull", False)),
+                fields=("client_key",),
+                name="case_client_key_uniq",
+            ),
+        ),
+    ]
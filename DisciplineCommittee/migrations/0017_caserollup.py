@@ -0,0 +1,58 @@
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Case = apps.get_model("DisciplineCommittee", "Case")
+    CaseRollup = apps.get_model("DisciplineCommittee", "CaseRollup")
+
+    grouped = (
+        Case.objects.order_by()
+        .annotate(month=TruncMonth("date"))
+        .values("department", "year", "case_type", "month")
+        .annotate(n=Count("id"))
+    )
+    CaseRollup.objects.bulk_create(
+        (
+            CaseRollup(
+                department=row["department"], year=row["year"], case_type=row["case_type"],
+                month=row["month"], count=row["n"],
+            )
+            for row in grouped.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("DisciplineCommittee", "0016_case_client_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CaseRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("department", models.CharField(max_length=50)),
+                ("year", models.CharField(max_length=20)),
+                ("case_type", models.CharField(max_length=50)),
+                ("month", models.DateField()),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("department", "year", "case_type", "month"),
+                        name="caserollup_bucket_uniq",
+                    ),
+                ],
+                "indexes": [
+                    models.Index(fields=["month", "case_type"], name="caserollup_month_idx"),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Case = apps.get_model("DisciplineCommittee", "Case")
+    StudentCaseCounter = apps.get_model("DisciplineCommittee", "StudentCaseCounter")
+
+    grouped = Case.objects.order_by().values("usn", "case_type").annotate(n=Count("id"))
+    StudentCaseCounter.objects.bulk_create(
+        (StudentCaseCounter(usn=row["usn"], case_type=row["case_type"], count=row["n"]) for row in grouped.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("DisciplineCommittee", "0017_caserollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StudentCaseCounter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("usn", models.CharField(max_length=20)),
+                ("case_type", models.CharField(max_length=50)),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("usn", "case_type"), name="studentcasecounter_uniq"),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # 0010 renamed the created_by reverse accessor to "created_cases" and
+    # added Case.student with CASCADE, neither of which models.py picked up.
+    # Both changes here are Python-side only (related_name, on_delete), so
+    # no SQL runs and the case table and its FTS triggers are untouched.
+
+    dependencies = [
+        ("DisciplineCommittee", "0018_studentcasecounter"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="case",
+            name="created_by",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="cases",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="case",
+            name="student",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="cases",
+                to="DisciplineCommittee.student",
+            ),
+        ),
+    ]
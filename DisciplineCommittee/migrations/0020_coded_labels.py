@@ -0,0 +1,233 @@
+"""Store department, year and case type as integer codes (see codes.py).
+
+Each column is copied into a nullable ``<name>_code`` column in id
+chunks, one UPDATE per chunk, then the text column is dropped and the
+code column takes its name. Making the columns NOT NULL rebuilds each
+table once on SQLite (make_not_null); the small counter tables are also
+rebuilt to drop and re-add their unique constraints. Rebuilding drops
+the FTS triggers from 0014_case_fts, so they are dropped up front (and
+the chunked UPDATEs do not reindex every row) and created again at the
+end. Row ids and text are unchanged, so the FTS tables themselves stay
+valid. The migration cannot be unapplied.
+"""
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+import DisciplineCommittee.codes
+from DisciplineCommittee.codes import initial_code, next_code
+
+CHUNK_SIZE = 2000
+
+# (model, field, kind, label length)
+CODED_FIELDS = [
+    ("case", "department", "department", 50),
+    ("case", "year", "year", 20),
+    ("case", "case_type", "case_type", 50),
+    ("student", "department", "department", 50),
+    ("student", "year", "year", 10),
+    ("uniformviolation", "department", "department", 50),
+    ("uniformviolation", "year", "year", 10),
+    ("caserollup", "department", "department", 50),
+    ("caserollup", "year", "year", 20),
+    ("caserollup", "case_type", "case_type", 50),
+    ("studentcasecounter", "case_type", "case_type", 50),
+]
+
+CASE_TYPES = [
+    ("Late Arrival", "Late Arrival"),
+    ("Academic Misconduct", "Academic Misconduct"),
+    ("Uniform Violation", "Uniform Violation"),
+    ("Other", "Other"),
+]
+
+FTS_TRIGGERS = [
+    # (fts table, content table, indexed columns), as in 0014_case_fts
+    ("DisciplineCommittee_case_fts", "DisciplineCommittee_case", ["student_name", "description"]),
+    (
+        "DisciplineCommittee_uniformviolation_fts",
+        "DisciplineCommittee_uniformviolation",
+        ["name", "violations", "description"],
+    ),
+]
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for fts, _, _ in FTS_TRIGGERS:
+        for suffix in ("ai", "ad", "au"):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{suffix}"')
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    drop_triggers(apps, schema_editor)
+    for fts, content, columns in FTS_TRIGGERS:
+        cols = ", ".join(columns)
+        new_cols = ", ".join(f"new.{c}" for c in columns)
+        old_cols = ", ".join(f"old.{c}" for c in columns)
+        schema_editor.execute(
+            f'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{content}" BEGIN '
+            f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new.id, {new_cols}); END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{content}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old.id, {old_cols}); END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER "{fts}_au" AFTER UPDATE OF {cols} ON "{content}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old.id, {old_cols}); '
+            f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new.id, {new_cols}); END'
+        )
+
+
+def _chunked_update(model, **values):
+    upper = model.objects.aggregate(upper=Max("id"))["upper"] or 0
+    for start in range(0, upper, CHUNK_SIZE):
+        model.objects.filter(id__gt=start, id__lte=start + CHUNK_SIZE).update(**values)
+
+
+def encode_labels(apps, schema_editor):
+    Code = apps.get_model("DisciplineCommittee", "Code")
+
+    labels = {"case_type": {value for value, _ in CASE_TYPES}}
+    for model_name, field, kind, _ in CODED_FIELDS:
+        model = apps.get_model("DisciplineCommittee", model_name)
+        labels.setdefault(kind, set()).update(
+            model.objects.order_by().values_list(field, flat=True).distinct()
+        )
+
+    # the same codes codes.code_for() would have handed out
+    rows = []
+    for kind, kind_labels in labels.items():
+        taken = set()
+        for label in sorted(kind_labels):
+            code = initial_code(kind, label)
+            while code in taken:
+                code = next_code(code)
+            taken.add(code)
+            rows.append(Code(kind=kind, code=code, label=label))
+    Code.objects.bulk_create(rows, batch_size=1000)
+
+    for model_name, field, kind, _ in CODED_FIELDS:
+        model = apps.get_model("DisciplineCommittee", model_name)
+        code = Code.objects.filter(kind=kind, label=OuterRef(field)).values("code")[:1]
+        _chunked_update(model, **{f"{field}_code": Subquery(code)})
+
+
+def coded_field(kind, label_length, model_name, field):
+    choices = CASE_TYPES if (model_name, field) == ("case", "case_type") else None
+    return DisciplineCommittee.codes.CodedField(kind=kind, label_length=label_length, choices=choices)
+
+
+def _fields_by_model():
+    by_model = {}
+    for model_name, field, kind, label_length in CODED_FIELDS:
+        by_model.setdefault(model_name, []).append((field, kind, label_length))
+    return by_model.items()
+
+
+def make_not_null(model_name, fields):
+    """Turn the model's code columns into NOT NULL CodedFields at once.
+
+    One AlterField per column would rebuild the table once per column on
+    SQLite; this rebuilds it once for all of them.
+    """
+    def run(apps, schema_editor):
+        model = apps.get_model("DisciplineCommittee", model_name)
+        alter_fields = []
+        for field, kind, label_length in fields:
+            new_field = coded_field(kind, label_length, model_name, field)
+            new_field.set_attributes_from_name(field)
+            new_field.model = model
+            alter_fields.append((model._meta.get_field(field), new_field))
+        if schema_editor.connection.vendor == "sqlite":
+            schema_editor._remake_table(model, alter_fields=alter_fields)
+        else:
+            for old_field, new_field in alter_fields:
+                schema_editor.alter_field(model, old_field, new_field)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("DisciplineCommittee", "0019_case_student_state"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Code",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(max_length=20)),
+                ("code", models.IntegerField()),
+                ("label", models.CharField(max_length=100)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("kind", "label"), name="code_kind_label_uniq"),
+                    models.UniqueConstraint(fields=("kind", "code"), name="code_kind_code_uniq"),
+                ],
+            },
+        ),
+        migrations.RunPython(drop_triggers, create_triggers),
+        # indexes over the text columns are rebuilt over the codes below
+        migrations.RemoveIndex(model_name="case", name="case_type_date_idx"),
+        migrations.RemoveConstraint(model_name="caserollup", name="caserollup_bucket_uniq"),
+        migrations.RemoveIndex(model_name="caserollup", name="caserollup_month_idx"),
+        migrations.RemoveConstraint(model_name="studentcasecounter", name="studentcasecounter_uniq"),
+        *(
+            migrations.AddField(
+                model_name=model_name,
+                name=f"{field}_code",
+                field=models.IntegerField(null=True),
+            )
+            for model_name, field, _, _ in CODED_FIELDS
+        ),
+        # the text columns cannot be re-added NOT NULL, so this is one-way
+        migrations.RunPython(encode_labels),
+        *(
+            migrations.RemoveField(model_name=model_name, name=field)
+            for model_name, field, _, _ in CODED_FIELDS
+        ),
+        *(
+            migrations.RenameField(model_name=model_name, old_name=f"{field}_code", new_name=field)
+            for model_name, field, _, _ in CODED_FIELDS
+        ),
+        *(
+            migrations.SeparateDatabaseAndState(
+                state_operations=[
+                    migrations.AlterField(
+                        model_name=model_name,
+                        name=field,
+                        field=coded_field(kind, label_length, model_name, field),
+                    )
+                    for field, kind, label_length in fields
+                ],
+                database_operations=[migrations.RunPython(make_not_null(model_name, fields))],
+            )
+            for model_name, fields in _fields_by_model()
+        ),
+        migrations.AddIndex(
+            model_name="case",
+            index=models.Index(fields=["case_type", "date"], name="case_type_date_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="caserollup",
+            constraint=models.UniqueConstraint(
+                fields=("department", "year", "case_type", "month"),
+                name="caserollup_bucket_uniq",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="caserollup",
+            index=models.Index(fields=["month", "case_type"], name="caserollup_month_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="studentcasecounter",
+            constraint=models.UniqueConstraint(fields=("usn", "case_type"), name="studentcasecounter_uniq"),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 
+from . import codes
+from .codes import CodedField
+
 
 class Teacher(models.Model):
     email = models.EmailField(unique=True)
@@ -10,11 +13,28 @@ class Teacher(models.Model):
     def __str__(self):
         return self.email
 
+class Code(models.Model):
+    """The label behind each integer stored in a CodedField (see codes.py)."""
+
+    kind = models.CharField(max_length=20)
+    code = models.IntegerField()
+    label = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "label"], name="code_kind_label_uniq"),
+            models.UniqueConstraint(fields=["kind", "code"], name="code_kind_code_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.code}: {self.label}"
+
+
 class UniformViolation(models.Model):
     usn = models.CharField(max_length=20)
     name = models.CharField(max_length=100)
-    year = models.CharField(max_length=10)
-    department = models.CharField(max_length=50)
+    year = CodedField(kind=codes.YEAR, label_length=10)
+    department = CodedField(kind=codes.DEPARTMENT, label_length=50)
     date = models.DateField()
     prior_count = models.IntegerField()
     violations = models.TextField()
@@ -33,14 +53,23 @@ class Case(models.Model):
         ("Other", "Other"),
     ]
 
-    # Student details
+    # Student details. The copies below are what the form or import gave
+    # and cover USNs that are not in the directory; ``student`` links the
+    # Student row when there is one (backfilled by link_case_students).
+    student = models.ForeignKey(
+        "Student",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="cases",
+    )
     usn = models.CharField(max_length=20)
     student_name = models.CharField(max_length=100)
-    year = models.CharField(max_length=20)
-    department = models.CharField(max_length=50)
+    year = CodedField(kind=codes.YEAR, label_length=20)
+    department = CodedField(kind=codes.DEPARTMENT, label_length=50)
 
     # Case details
-    case_type = models.CharField(max_length=50, choices=CASE_TYPES)
+    case_type = CodedField(kind=codes.CASE_TYPE, label_length=50, choices=CASE_TYPES)
     date = models.DateField()
     description = models.TextField(blank=True)
 
@@ -54,16 +83,104 @@ class Case(models.Model):
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Idempotency key from the offline queue in forms.js: a report that is
+    # synced again after a dropped response is skipped, not filed twice.
+    client_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            # partial, so the form-filed cases without a key cost nothing
+            models.UniqueConstraint(
+                fields=["client_key"],
+                condition=models.Q(client_key__isnull=False),
+                name="case_client_key_uniq",
+            ),
+        ]
+        indexes = [
+            # student/teacher dashboards: filter, newest first. Ascending so a
+            # backwards scan yields (created_at, id) DESC for keyset paging.
+            models.Index(fields=["usn", "created_at"], name="case_usn_created_idx"),
+            models.Index(fields=["created_by", "created_at"], name="case_creator_created_idx"),
+            # date-range reports per case type
+            models.Index(fields=["case_type", "date"], name="case_type_date_idx"),
+        ]
+
     def __str__(self):
         return f"{self.student_name} - {self.case_type}"
 
+    def save(self, *args, **kwargs):
+        # The counters updated from post_save (signals.py) must commit or
+        # roll back together with the case row itself.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
+class TeacherCaseStats(models.Model):
+    """Running per-teacher case totals, kept in step with Case writes by counters.py."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="case_stats"
+    )
+    total = models.IntegerField(default=0)
+    late_arrival = models.IntegerField(default=0)
+    academic_misconduct = models.IntegerField(default=0)
+    uniform_violation = models.IntegerField(default=0)
+    other = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user} - {self.total} case(s)"
+
+
+class CaseRollup(models.Model):
+    """Case counts per department, year, case type and month, kept in step with Case writes by counters.py."""
+
+    department = CodedField(kind=codes.DEPARTMENT, label_length=50)
+    year = CodedField(kind=codes.YEAR, label_length=20)
+    case_type = CodedField(kind=codes.CASE_TYPE, label_length=50)
+    month = models.DateField()  # first day of the month
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["department", "year", "case_type", "month"],
+                name="caserollup_bucket_uniq",
+            ),
+        ]
+        indexes = [
+            # month-range slices that do not filter on department
+            models.Index(fields=["month", "case_type"], name="caserollup_month_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.department} {self.year} {self.case_type} {self.month:%Y-%m}: {self.count}"
+
+
+class StudentCaseCounter(models.Model):
+    """Number of cases of each type per USN, kept in step with Case writes by counters.py."""
+
+    usn = models.CharField(max_length=20)
+    case_type = CodedField(kind=codes.CASE_TYPE, label_length=50)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["usn", "case_type"], name="studentcasecounter_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.usn} - {self.case_type}: {self.count}"
+
 
 class Student(models.Model):
     usn = models.CharField(max_length=20, unique=True)
     name = models.CharField(max_length=100)
     email = models.EmailField()
-    department = models.CharField(max_length=50)
-    year = models.CharField(max_length=10)
+    department = CodedField(kind=codes.DEPARTMENT, label_length=50)
+    year = CodedField(kind=codes.YEAR, label_length=10)
     password = models.CharField(max_length=100)  
 
     def __str__(self):
@@ -106,6 +223,26 @@ class Activity(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # latest-N reads per user; ascending so a backwards scan also
+            # yields (timestamp, id) DESC
+            models.Index(fields=['user', 'timestamp'], name='activity_user_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} — {self.action} @ {self.timestamp.isoformat()}"
+
+
+class ActivityArchive(models.Model):
+    """Activities pruned from the hot Activity table (see activity.prune_history)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    action = models.CharField(max_length=200)
+    details = models.TextField(blank=True)
+    timestamp = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-timestamp']
+
+    def __str__(self):
+        return f"{self.user} — {self.action} @ {self.timestamp.isoformat()} (archived)"
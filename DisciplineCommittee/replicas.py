@@ -0,0 +1,128 @@
+"""Read/write split between the primary database and a read replica.
+
+Only views wrapped in @replica_reads send their reads to the replica
+(settings.REPLICA_DATABASE); everything else, and every write, uses the
+primary. Within a request, the first write pins all later reads to the
+primary. ReplicaPinningMiddleware also sets a short-lived cookie after a
+write so the same client keeps reading from the primary for
+REPLICA_PIN_SECONDS, long enough for the replica to catch up with what
+the client just wrote.
+"""
+import contextvars
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class _State:
+    __slots__ = ('use_replica', 'pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.use_replica = False
+        self.pinned = pinned
+        self.wrote = False
+
+
+# a mutable holder, so a write inside sync_to_async() is seen by the caller
+_state = contextvars.ContextVar('dcomm_replica_state', default=None)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replica = settings.REPLICA_DATABASE
+        if (replica and state is not None and state.use_replica and not state.pinned
+                and not connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def replica_reads(view):
+    """Let ``view`` (sync or async) read from the replica unless pinned."""
+    def enter():
+        state = _state.get()
+        token = None
+        if state is None:
+            state = _State()
+            token = _state.set(state)
+        previous, state.use_replica = state.use_replica, True
+        return state, previous, token
+
+    def leave(state, previous, token):
+        state.use_replica = previous
+        if token is not None:
+            _state.reset(token)
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            context = enter()
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                leave(*context)
+    else:
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            context = enter()
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                leave(*context)
+    return inner
+
+
+class ReplicaPinningMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
+
+    def _start(self, request):
+        state = _State(pinned=settings.REPLICA_PIN_COOKIE in request.COOKIES)
+        return state, _state.set(state)
+
+    def _finish(self, state, response):
+        if state.wrote and settings.REPLICA_DATABASE and settings.REPLICA_PIN_SECONDS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
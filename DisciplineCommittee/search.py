@@ -0,0 +1,79 @@
+"""Ranked full-text search over case text using the FTS5 tables.
+
+The virtual tables and their sync triggers are created by migration
+0014_case_fts (the triggers again by 0020_coded_labels); this module
+only queries and rebuilds them.
+"""
+from django.db import connection
+
+from . import codes
+
+CASE_FTS = "DisciplineCommittee_case_fts"
+VIOLATION_FTS = "DisciplineCommittee_uniformviolation_fts"
+FTS_TABLES = (CASE_FTS, VIOLATION_FTS)
+
+# snippet() markers around matched terms
+HIGHLIGHT = ("[", "]")
+
+
+def search_available():
+    return connection.vendor == "sqlite"
+
+
+def to_match_query(text):
+    """Quote each word so user input is never parsed as FTS5 syntax.
+
+    Terms are ANDed, as FTS5 does for bare words.
+    """
+    terms = [t.replace('"', '""') for t in text.split()]
+    return " ".join(f'"{t}"' for t in terms if t)
+
+
+def _search(sql, query, limit):
+    match = to_match_query(query)
+    if not match:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*HIGHLIGHT, match, limit])
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def search_cases(query, limit=20):
+    """Best-matching cases first (bm25), each with a highlighted snippet."""
+    rows = _search(f'''
+        WITH hits AS (
+            SELECT rowid, snippet("{CASE_FTS}", -1, %s, %s, '…', 12) AS snippet, rank
+            FROM "{CASE_FTS}" WHERE "{CASE_FTS}" MATCH %s
+            ORDER BY rank LIMIT %s
+        )
+        SELECT c.id, c.usn, c.student_name, c.case_type, c.date, hits.snippet
+        FROM hits JOIN "DisciplineCommittee_case" c ON c.id = hits.rowid
+        ORDER BY hits.rank
+    ''', query, limit)
+    for row in rows:
+        # raw SQL skips CodedField's conversion
+        row["case_type"] = codes.label_for(codes.CASE_TYPE, row["case_type"])
+    return rows
+
+
+def search_violations(query, limit=20):
+    return _search(f'''
+        WITH hits AS (
+            SELECT rowid, snippet("{VIOLATION_FTS}", -1, %s, %s, '…', 12) AS snippet, rank
+            FROM "{VIOLATION_FTS}" WHERE "{VIOLATION_FTS}" MATCH %s
+            ORDER BY rank LIMIT %s
+        )
+        SELECT v.id, v.usn, v.name, v.date, hits.snippet
+        FROM hits JOIN "DisciplineCommittee_uniformviolation" v ON v.id = hits.rowid
+        ORDER BY hits.rank
+    ''', query, limit)
+
+
+def rebuild_indexes(optimize=False):
+    """Re-read every FTS table from its content table."""
+    with connection.cursor() as cursor:
+        for table in FTS_TABLES:
+            cursor.execute(f'INSERT INTO "{table}"("{table}") VALUES (\'rebuild\')')
+            if optimize:
+                cursor.execute(f'INSERT INTO "{table}"("{table}") VALUES (\'optimize\')')
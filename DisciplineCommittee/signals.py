@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, dashboard_cache, directory, events
+from .models import Case, Student, StudentProfile, TeacherProfile
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_directory(sender, instance, **kwargs):
+    directory.invalidate(instance.usn)
+    # a concurrent lookup may re-cache the old row before we commit
+    transaction.on_commit(lambda: directory.invalidate(instance.usn))
+    dashboard_cache.bump(dashboard_cache.STUDENT, instance.usn)
+
+
+@receiver(post_save, sender=Student)
+def link_student_cases(sender, instance, created, **kwargs):
+    if created:
+        # cases filed before the student registered
+        Case.objects.filter(usn=instance.usn, student__isnull=True).update(student=instance)
+        return
+    # teacher dashboards show the linked student's name
+    teachers = Case.objects.filter(student=instance).values_list("created_by_id", flat=True).distinct()
+    for user_id in teachers:
+        dashboard_cache.bump(dashboard_cache.TEACHER, user_id)
+
+
+@receiver(post_save, sender=StudentProfile)
+def bump_student_dashboard(sender, instance, **kwargs):
+    dashboard_cache.bump(dashboard_cache.STUDENT, instance.usn)
+
+
+@receiver(post_save, sender=TeacherProfile)
+def bump_teacher_dashboard(sender, instance, **kwargs):
+    dashboard_cache.bump(dashboard_cache.TEACHER, instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def bump_user_dashboard(sender, instance, update_fields=None, **kwargs):
+    # every login saves last_login, which no dashboard shows
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    dashboard_cache.bump(dashboard_cache.TEACHER, instance.pk)
+
+
+@receiver(pre_save, sender=Case)
+def remember_counted_values(sender, instance, **kwargs):
+    if instance.pk is not None and not instance._state.adding:
+        instance._counted_values = (
+            Case.objects.filter(pk=instance.pk).values(*counters.COUNTED_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Case)
+def count_saved_case(sender, instance, created, **kwargs):
+    if created:
+        counters.apply_case_delta([instance], +1)
+        events.notify_new_cases([instance])
+        return
+    old = getattr(instance, "_counted_values", None)
+    if old and old != counters.counted_values(instance):
+        counters.apply_case_delta([old], -1)
+        counters.apply_case_delta([instance], +1)
+    else:
+        counters.touch(instance)
+
+
+@receiver(post_delete, sender=Case)
+def uncount_deleted_case(sender, instance, **kwargs):
+    counters.apply_case_delta([instance], -1)
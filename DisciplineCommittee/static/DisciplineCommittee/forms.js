@@ -1,37 +1,203 @@
 // forms.js - unified form handling and small UI helpers
 (function(){
-  function showToast(message, type='success'){
+  function showToast(message, type='success', duration=2200){
     let t = document.getElementById('page-toast');
     if(!t){ t = document.createElement('div'); t.id='page-toast'; document.body.appendChild(t); }
     t.textContent = message;
     t.style.background = type==='success' ? 'linear-gradient(90deg,#16a34a,#059669)' : 'linear-gradient(90deg,#ef4444,#b91c1c)';
     t.classList.add('show');
     clearTimeout(t._hide);
-    t._hide = setTimeout(()=> t.classList.remove('show'), 2200);
+    t._hide = setTimeout(()=> t.classList.remove('show'), duration);
+  }
+
+  // Offline case queue. A submitted report is queued in localStorage with a
+  // random client_key and the whole queue is sent to the batch endpoint in
+  // one request. Entries leave the queue only once the server has answered
+  // for them, and a report sent twice (e.g. the response was lost on the way
+  // back) is recognised by its key and not filed again. Queued reports the
+  // server refuses are kept under REJECTED_KEY until a page has shown them.
+  const QUEUE_KEY = 'caseQueue_v1';
+  const REJECTED_KEY = 'caseQueueRejected_v1';
+  const SYNC_URL = '/api/cases/batch/';
+  const MAX_BATCH = 500;  // ingest.MAX_BATCH_CASES
+  const FILED = ['created', 'duplicate'];
+  let syncing = null;
+  // keys of reports whose form is waiting to show the outcome itself
+  const waiting = new Set();
+
+  function readList(key){
+    try { return JSON.parse(localStorage.getItem(key)) || []; }
+    catch(e){ return []; }
+  }
+
+  function readQueue(){ return readList(QUEUE_KEY); }
+
+  function writeQueue(queue){
+    localStorage.setItem(QUEUE_KEY, JSON.stringify(queue));
+  }
+
+  function isQueued(key){
+    return readQueue().some(item => item.client_key === key);
+  }
+
+  function newKey(){
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2, 12);
+  }
+
+  function caseFromForm(form){
+    const data = new FormData(form);
+    const text = name => (data.get(name) || '').toString().trim();
+    return {
+      client_key: newKey(),
+      usn: text('usn'),
+      student_name: text('student_name') || text('name'),
+      year: text('year'),
+      department: text('department'),
+      date: text('date') || new Date().toISOString().slice(0,10),
+      case_type: form.dataset.caseType || text('case_type'),
+      description: text('reason') || text('description'),
+      violations: data.getAll('violation'),
+    };
+  }
+
+  function errorText(errors){
+    return Object.keys(errors).map(field => field + ' ' + errors[field]).join('; ');
+  }
+
+  function keepRejected(items){
+    if (!items.length) return;
+    localStorage.setItem(REJECTED_KEY, JSON.stringify(readList(REJECTED_KEY).concat(items)));
+  }
+
+  // Tell the user about queued reports from earlier visits that were refused.
+  function showRejected(){
+    const rejected = readList(REJECTED_KEY);
+    if (!rejected.length) return;
+    localStorage.removeItem(REJECTED_KEY);
+    const details = rejected.map(r => r.usn + ' (' + r.case_type + '): ' + errorText(r.errors)).join(' | ');
+    showToast(rejected.length + ' queued report(s) were not filed - ' + details, 'error', 10000);
+  }
+
+  // The token of the current session, read at send time: logging in again
+  // rotates it, so one saved with a queued report may no longer be valid.
+  function csrfToken(){
+    const cookie = document.cookie.split('; ').find(c => c.startsWith('csrftoken='));
+    if (cookie) return decodeURIComponent(cookie.slice('csrftoken='.length));
+    const field = document.querySelector('input[name="csrfmiddlewaretoken"]');
+    return field ? field.value : '';
+  }
+
+  // Send the queue. Resolves to {sent: {client_key: result}}. Rejects when
+  // the request did not get an answer (offline, timeout, server error), with
+  // error.auth set when the session is gone or not allowed to file (403),
+  // or with error.refused set when the server turned the whole batch down.
+  function syncQueue(){
+    if (syncing) return syncing;
+    const batch = readQueue().slice(0, MAX_BATCH);
+    if (!batch.length) return Promise.resolve({ sent: {} });
+    syncing = fetch(SYNC_URL, {
+      method: 'POST',
+      credentials: 'same-origin',
+      headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken() },
+      // reports queued by older versions still carry their own csrf copy
+      body: JSON.stringify({ cases: batch.map(({ csrf, ...item }) => item) }),
+    }).then(response => {
+      if (response.status === 403){
+        const error = new Error('please log in again as a teacher');
+        error.auth = true;
+        throw error;
+      }
+      if (response.status >= 500) throw new Error('HTTP ' + response.status);
+      return response.json();
+    }).then(data => {
+      if (!Array.isArray(data.results)){
+        const error = new Error(data.error || 'the server refused the reports');
+        error.refused = true;
+        throw error;
+      }
+      const sent = {};
+      data.results.forEach(result => { sent[batch[result.index].client_key] = result; });
+      keepRejected(batch.filter(item => {
+        const result = sent[item.client_key];
+        return result && result.status === 'invalid' && !waiting.has(item.client_key);
+      }).map(item => ({ usn: item.usn, case_type: item.case_type, errors: sent[item.client_key].errors })));
+      writeQueue(readQueue().filter(item => !(item.client_key in sent)));
+      return { sent };
+    }).finally(() => { syncing = null; });
+    return syncing;
+  }
+
+  // Sync until the server has answered for ``key``. A sync that was already
+  // running when the report was queued did not carry it, so go again.
+  function syncFor(key){
+    return syncQueue().then(result => {
+      if (key in result.sent || !isQueued(key)) return result;
+      return syncFor(key);
+    });
+  }
+
+  // Send what earlier visits left queued, and report anything refused.
+  function flushQueue(){
+    return syncQueue().then(({ sent }) => {
+      showRejected();
+      const filed = Object.values(sent).filter(result => result.status === 'created').length;
+      if (filed && document.body.dataset.caseQueueReload !== undefined) window.location.reload();
+    }).catch(error => {
+      // offline: the 'online' event retries; anything else needs the user
+      if (error.auth || error.refused){
+        showToast(readQueue().length + ' queued report(s) not sent: ' + error.message, 'error', 6000);
+      }
+    });
   }
 
   function handleFormSubmit(e){
     e.preventDefault();
     const form = e.currentTarget;
-    const studentName = (form.querySelector('input[placeholder="Enter student name"]') || {}).value || 'Unknown';
-    const date = (form.querySelector('#dateField') && form.querySelector('#dateField').value) || new Date().toISOString().slice(0,10);
-    const cases = JSON.parse(localStorage.getItem('cases')) || [];
-    const newCase = { student: studentName, category: document.title || 'Case', date };
-    cases.unshift(newCase);
-    localStorage.setItem('cases', JSON.stringify(cases));
-    showToast('Report submitted', 'success');
-    setTimeout(()=> window.location.href='/', 450);
+    const item = caseFromForm(form);
+    writeQueue(readQueue().concat([item]));
+    waiting.add(item.client_key);
+
+    syncFor(item.client_key).then(({ sent }) => {
+      const result = sent[item.client_key];
+      if (result && result.status === 'invalid'){
+        showToast('Report not filed: ' + errorText(result.errors), 'error');
+        return;
+      }
+      if (!result || !FILED.includes(result.status)){
+        // sent by another tab's sync; its outcome is not ours to report
+        showToast('Report queued - it will be sent shortly', 'success');
+        form.reset();
+        return;
+      }
+      showToast('Report submitted', 'success');
+      setTimeout(()=> window.location.href = form.dataset.next || '/teacher-dashboard/', 450);
+    }).catch(error => {
+      if (error.refused || error.auth){
+        showToast('Report not sent: ' + error.message + ' - it stays queued', 'error');
+        return;
+      }
+      showToast('Saved offline - it will be sent when the connection is back', 'success');
+      form.reset();
+    }).finally(() => {
+      waiting.delete(item.client_key);
+      // after this report's own toast; the next page shows them otherwise
+      setTimeout(showRejected, 2400);
+    });
   }
 
+  // retry whatever is still queued whenever the browser is back online
+  window.addEventListener('online', flushQueue);
+
   document.addEventListener('DOMContentLoaded', function(){
-    document.querySelectorAll('form').forEach(form => {
-      // Only attach to case report forms (heuristic: has input placeholder 'Enter student name')
-      if (form.querySelector('input[placeholder="Enter student name"]')){
-        // Remove any existing handler to avoid double-binding
-        form.removeEventListener('submit', handleFormSubmit);
-        form.addEventListener('submit', handleFormSubmit);
-      }
+    document.querySelectorAll('form[data-case-queue]').forEach(form => {
+      // Remove any existing handler to avoid double-binding
+      form.removeEventListener('submit', handleFormSubmit);
+      form.addEventListener('submit', handleFormSubmit);
     });
+    // reports queued on an earlier visit
+    showRejected();
+    flushQueue();
 
     // Small accessibility: focus first input on load
     const firstInput = document.querySelector('form input, form select, form textarea');
@@ -90,5 +256,5 @@
   });
 
   // Expose helper in case other scripts want it
-  window.formsUI = { showToast };
+  window.formsUI = { showToast, syncQueue, flushQueue };
 })();
\ No newline at end of file
@@ -17,6 +17,7 @@
   const recentComplaintsList = document.getElementById('recentComplaintsList');
   const noComplaints = document.getElementById('noComplaints');
   const exportBtn = document.getElementById('exportBtn');
+  const loadMoreBtn = document.getElementById('loadMoreComplaints');
 
   // Stats elements
   const totalComplaintsEl = document.getElementById('totalComplaints');
@@ -39,30 +40,47 @@
   function saveProfileObj(obj){
     localStorage.setItem(PROFILE_KEY, JSON.stringify(obj));
   }
+  // Server case history, fetched page by page from /api/student/cases/
+  // the first time a section that needs it is opened.
+  const HISTORY_URL = '/api/student/cases/';
+  const serverComplaints = [];
+  let historyCursor = null;
+  let historyStarted = false;
+  let historyLoading = false;
+
   function readComplaints(){
-    try{
-      // 🔒 SECURITY: Read ONLY from server-provided data in script tag
-      // This ensures each student sees only their own data
-      const serverDataEl = document.getElementById('student-cases');
-      if(serverDataEl){
-        const serverComplaints = JSON.parse(serverDataEl.textContent || '[]');
-        return serverComplaints.map((c, i) => ({
-          id: `server-${i}`,
-          title: c.category || c.case_type || '',
-          date: c.date || new Date().toISOString(),
-          desc: c.description || '',
-          status: c.status || 'pending',
-          priority: c.priority || 'medium',
-          course: c.course || '',
-          source: 'server'
-        }));
-      }
-      // Fallback: Try localStorage only as backup (empty by default)
-      const raw = localStorage.getItem(COMPLAINTS_KEY);
-      const studentArr = raw ? JSON.parse(raw) : [];
-      const normalizedStudent = (studentArr||[]).map((s,i)=>({ ...s, source: s.source || 'student' }));
-      return normalizedStudent;
-    }catch(e){return []}
+    return serverComplaints;
+  }
+
+  function toComplaint(c){
+    return {
+      id: `server-${c.id}`,
+      title: c.case_type || '',
+      date: c.date || new Date().toISOString(),
+      desc: c.description || '',
+      status: 'pending',
+      priority: 'medium',
+      course: '',
+      source: 'server'
+    };
+  }
+
+  function loadComplaintHistory(){
+    if(historyLoading) return;
+    if(historyStarted && !historyCursor) return;
+    historyLoading = true;
+    const url = historyCursor ? `${HISTORY_URL}?cursor=${encodeURIComponent(historyCursor)}` : HISTORY_URL;
+    fetch(url, { credentials: 'same-origin' })
+      .then(res => res.ok ? res.json() : Promise.reject(res.status))
+      .then(data => {
+        historyStarted = true;
+        historyCursor = data.next_cursor || null;
+        (data.cases || []).forEach(c => serverComplaints.push(toComplaint(c)));
+        if(loadMoreBtn) loadMoreBtn.style.display = historyCursor ? 'inline-flex' : 'none';
+        renderComplaints();
+      })
+      .catch(() => showToast('Could not load complaints'))
+      .finally(() => { historyLoading = false; });
   }
   function saveComplaints(arr){
     localStorage.setItem(COMPLAINTS_KEY, JSON.stringify(arr));
@@ -75,6 +93,7 @@
     // update page title
     const title = id === 'dashboard' ? 'Dashboard' : (id === 'profile' ? 'My Profile' : (id === 'complaints' ? 'My Complaints' : 'Statistics'));
     if(pageTitle) pageTitle.textContent = title;
+    if((id === 'complaints' || id === 'statistics') && !historyStarted) loadComplaintHistory();
     // update hash (do not add duplicate history entries)
     try{ if(history && history.replaceState) history.replaceState(null, '', '#'+id); else location.hash = id; }catch(e){}
     // scroll and focus
@@ -336,6 +355,8 @@
     localStorage.setItem(COMPLAINTS_KEY, JSON.stringify(arr)); renderComplaints(); closeComplaintModal(); showToast('Complaint deleted');
   });
 
+  if(loadMoreBtn) loadMoreBtn.addEventListener('click', loadComplaintHistory);
+
   // Export
   if(exportBtn) exportBtn.addEventListener('click', ()=>{
     const all = readComplaints();
@@ -392,6 +413,20 @@
       if(!within && !toggleBtn && sidebar.classList.contains('open')) sidebar.classList.remove('open');
     });
 
+    // server push for newly filed cases (no client-side polling)
+    if(window.EventSource){
+      const stream = new EventSource('/api/student/events/');
+      stream.addEventListener('case', (e)=>{
+        let c;
+        try{ c = JSON.parse(e.data); }catch(err){ return; }
+        if(totalComplaintsEl) totalComplaintsEl.textContent = (parseInt(totalComplaintsEl.textContent, 10) || 0) + 1;
+        if(historyStarted){ serverComplaints.unshift(toComplaint(c)); renderComplaints(); }
+        const badge = document.querySelector('.notification-bell .badge');
+        if(badge){ badge.textContent = (parseInt(badge.textContent, 10) || 0) + 1; badge.style.display = 'flex'; }
+        showToast(`New complaint received: ${c.case_type}`);
+      });
+    }
+
     // listen for storage changes (so teacher tab updates student dashboard in other tab)
     window.addEventListener('storage', (e)=>{
       if(e.key === 'cases' || e.key === COMPLAINTS_KEY){
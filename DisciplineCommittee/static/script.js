@@ -132,8 +132,24 @@ document.addEventListener('DOMContentLoaded', async function() {
     // Listen for new complaints from teachers (via localStorage event)
     window.addEventListener('storage', handleStorageChange);
 
-    // Also check periodically for new complaints (simulating real-time updates)
-    setInterval(function(){ if (typeof checkForNewComplaints === 'function') checkForNewComplaints(); }, 2000);
+    // New complaints are pushed by the server as they are filed
+    if (window.EventSource && document.querySelector('.notification-bell')) {
+        const stream = new EventSource('/api/student/events/');
+        stream.addEventListener('case', function(e) {
+            try {
+                const c = JSON.parse(e.data);
+                receiveComplaintFromTeacher({
+                    id: 'server-' + c.id,
+                    title: c.case_type,
+                    category: c.case_type,
+                    date: c.date,
+                    description: c.description
+                });
+            } catch (err) {
+                console.error('Error parsing complaint event:', err);
+            }
+        });
+    }
 });
 
 // Initialize dashboard
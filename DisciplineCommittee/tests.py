@@ -1,3 +1,1310 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+import datetime
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import LiveServerTestCase, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
+
+from . import activity, async_views, codes, dashboard_cache, db, directory, ingest, replicas, throttle
+from .models import (
+    Activity, ActivityArchive, Case, CaseRollup, Code, Student, StudentCaseCounter, StudentProfile, TeacherCaseStats,
+    UniformViolation,
+)
+
+
+CASE_TABLE = Case._meta.db_table
+
+
+def clear_dashboards():
+    caches[settings.DASHBOARD_CACHE].clear()
+
+
+def login_student(client, student):
+    # through the view rather than client.session, so it works with every session engine
+    with contextlib.redirect_stdout(io.StringIO()):
+        client.post(reverse("student_login"), {"usn": student.usn, "password": student.password})
+
+
+def make_case(teacher, usn="1AB21CS001", **kwargs):
+    fields = {
+        "usn": usn,
+        "student_name": "Test Student",
+        "year": "3",
+        "department": "CSE",
+        "case_type": "Late Arrival",
+        "date": datetime.date(2026, 1, 15),
+        "created_by": teacher,
+    }
+    fields.update(kwargs)
+    return Case.objects.create(**fields)
+
+
+class StudentDashboardTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="t@example.com", password="pw")
+        cls.student = Student.objects.create(
+            usn="1AB21CS001", name="Test Student", email="s@example.com",
+            department="CSE", year="3", password="pw",
+        )
+        cls.cases = [make_case(cls.teacher, description=f"case {i}") for i in range(7)]
+        make_case(cls.teacher, usn="1AB21CS999")
+
+    def setUp(self):
+        clear_dashboards()  # rendered dashboards are keyed by ids the rollback reuses
+        login_student(self.client, self.student)
+
+    def test_dashboard_reads_stats_and_recent_cases_in_one_query(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("student_dashboard"))
+        # the ETag watermark query reads Student; the page data is one Case query
+        case_queries = [q for q in captured.captured_queries if q["sql"].startswith(f'SELECT "{CASE_TABLE}"')]
+        self.assertEqual(len(case_queries), 1)
+        self.assertEqual(response.context["total_complaints"], 7)
+        self.assertEqual(
+            [c["id"] for c in response.context["recent_complaints"]],
+            [c.id for c in reversed(self.cases[-3:])],
+        )
+
+    def test_case_history_is_paginated_newest_first(self):
+        url = reverse("api_student_cases")
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.client.get(url, params).json()
+            seen.extend(c["id"] for c in data["cases"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(seen, [c.id for c in reversed(self.cases)])
+
+    def test_case_history_rejects_bad_cursor(self):
+        response = self.client.get(reverse("api_student_cases"), {"cursor": "!!"})
+        self.assertEqual(response.status_code, 400)
+
+
+class TeacherCaseBrowserTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="t@example.com", password="pw")
+        other = User.objects.create_user(username="o@example.com", password="pw")
+        cls.cases = [
+            make_case(cls.teacher, case_type=case_type, date=datetime.date(2026, 1, day))
+            for day, case_type in enumerate(["Late Arrival", "Other"] * 4, start=1)
+        ]
+        make_case(other)
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+
+    def fetch_all(self, **params):
+        seen, cursor = [], None
+        while True:
+            query = dict(params, limit=3)
+            if cursor:
+                query["cursor"] = cursor
+            data = self.client.get(reverse("api_teacher_cases"), query).json()
+            seen.extend(c["id"] for c in data["cases"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                return seen
+
+    def test_pages_through_own_cases_newest_first(self):
+        self.assertEqual(self.fetch_all(), [c.id for c in reversed(self.cases)])
+
+    def test_filters_by_case_type_and_date_range(self):
+        ids = self.fetch_all(case_type="Other", date_from="2026-01-03", date_to="2026-01-06")
+        expected = [
+            c.id for c in reversed(self.cases)
+            if c.case_type == "Other" and 3 <= c.date.day <= 6
+        ]
+        self.assertEqual(ids, expected)
+
+    def test_rejects_malformed_date(self):
+        response = self.client.get(reverse("api_teacher_cases"), {"date_from": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_case_list_page_links_to_older_cases(self):
+        response = self.client.get(reverse("teacher_cases"), {"limit": 5, "case_type": "Other"})
+        self.assertEqual(len(response.context["cases"]), 4)
+        self.assertIsNone(response.context["older_url"])
+        response = self.client.get(reverse("teacher_cases"), {"limit": 5})
+        self.assertIn("cursor=", response.context["older_url"])
+
+
+class DashboardQueryPlanTests(TestCase):
+    """The dashboard queries on Case must be answered from an index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="t@example.com", password="pw")
+        cls.student = Student.objects.create(
+            usn="1AB21CS001", name="Test Student", email="s@example.com",
+            department="CSE", year="3", password="pw",
+        )
+        for i in range(5):
+            make_case(cls.teacher, date=datetime.date(2026, 1, i + 1))
+
+    def setUp(self):
+        clear_dashboards()  # rendered dashboards are keyed by ids the rollback reuses
+
+    def case_queries(self, captured):
+        return [
+            q["sql"] for q in captured.captured_queries
+            if q["sql"].startswith("SELECT") and f'"{CASE_TABLE}"' in q["sql"]
+        ]
+
+    def assertIndexedPlan(self, sql, params=None):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        for step in plan:
+            self.assertFalse(
+                step.startswith(f"SCAN {CASE_TABLE}"),
+                f"full table scan in plan {plan} for {sql}",
+            )
+            self.assertNotIn("TEMP B-TREE", step, f"sort step in plan {plan} for {sql}")
+
+    def test_student_dashboard_queries_use_index(self):
+        login_student(self.client, self.student)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("student_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        queries = self.case_queries(captured)
+        self.assertTrue(queries)
+        for sql in queries:
+            self.assertIndexedPlan(sql)
+
+    def test_student_case_history_pages_use_index(self):
+        login_student(self.client, self.student)
+        first = self.client.get(reverse("api_student_cases"), {"limit": 2}).json()
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse("api_student_cases"), {"limit": 2, "cursor": first["next_cursor"]})
+        queries = self.case_queries(captured)
+        self.assertTrue(queries)
+        for sql in queries:
+            self.assertIndexedPlan(sql)
+
+    def test_teacher_case_pages_use_index(self):
+        self.client.force_login(self.teacher)
+        first = self.client.get(reverse("api_teacher_cases"), {"limit": 2}).json()
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse("api_teacher_cases"), {"limit": 2, "cursor": first["next_cursor"]})
+        queries = self.case_queries(captured)
+        self.assertTrue(queries)
+        for sql in queries:
+            self.assertIndexedPlan(sql)
+
+    def test_teacher_dashboard_queries_use_index(self):
+        self.client.force_login(self.teacher)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("teacher_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        queries = self.case_queries(captured)
+        self.assertTrue(queries)
+        for sql in queries:
+            self.assertIndexedPlan(sql)
+
+    def test_case_type_date_range_uses_index(self):
+        qs = Case.objects.filter(
+            case_type="Late Arrival",
+            date__range=(datetime.date(2026, 1, 1), datetime.date(2026, 1, 31)),
+        ).order_by("date")
+        self.assertIndexedPlan(*qs.query.sql_with_params())
+
+
+class ImportCasesCommandTests(TestCase):
+
+    def run_import(self, content, *args):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write(content)
+        self.addCleanup(os.unlink, f.name)
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_cases", f.name, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_imports_valid_rows_in_batches_and_reports_rejects(self):
+        teacher = User.objects.create_user(username="t@example.com", password="pw")
+        out, err = self.run_import(
+            "usn,student_name,year,department,case_type,date,description,created_by\n"
+            "1AB21CS001,Asha,3,CSE,Late Arrival,2023-02-01,late,t@example.com\n"
+            "1AB21CS002,Ravi,2,ECE,Bogus,2023-02-01,x,t@example.com\n"
+            "1AB21CS003,Kiran,1,ME,Other,2023-02-03,,nobody\n"
+            "1AB21CS004,Meera,1,ME,Other,2023-02-04,,\n"
+            "1AB21CS005,Dev,1,ME,Other,2023-02-05,,T@EXAMPLE.COM\n",
+            "--batch-size", "1", "--default-teacher", "t@example.com",
+        )
+        self.assertIn("Imported 3 row(s), rejected 2", out)
+        self.assertIn("line 3: unknown case_type", err)
+        self.assertIn("line 4: unknown created_by", err)
+        cases = Case.objects.order_by("usn")
+        self.assertEqual([c.usn for c in cases], ["1AB21CS001", "1AB21CS004", "1AB21CS005"])
+        self.assertTrue(all(c.created_by == teacher for c in cases))
+        self.assertEqual(TeacherCaseStats.objects.get(user=teacher).other, 2)
+        # historical rows keep their own date for ordering
+        self.assertEqual(cases[0].created_at.date(), datetime.date(2023, 2, 1))
+
+    def test_impossible_dates_reject_the_row(self):
+        User.objects.create_user(username="t@example.com", password="pw")
+        out, err = self.run_import(
+            "usn,student_name,year,department,case_type,date,created_at,created_by\n"
+            "1AB21CS001,Asha,3,CSE,Late Arrival,2024-02-30,,t@example.com\n"
+            "1AB21CS002,Ravi,3,CSE,Late Arrival,2024-02-01,2024-02-01T25:00:00,t@example.com\n"
+            "1AB21CS003,Kiran,3,CSE,Late Arrival,2024-02-01,,t@example.com\n",
+        )
+        self.assertIn("Imported 1 row(s), rejected 2", out)
+        self.assertIn("line 2: date must be a YYYY-MM-DD date", err)
+        self.assertIn("line 3: created_at must be an ISO datetime", err)
+
+    def test_imports_uniform_violations(self):
+        self.run_import(
+            "usn,name,year,department,date,prior_count,violations\n"
+            "1AB21CS001,Asha,3,CSE,2023-02-01,2,No ID card\n",
+            "--model", "uniform",
+        )
+        violation = UniformViolation.objects.get()
+        self.assertEqual((violation.prior_count, violation.violations), (2, "No ID card"))
+
+    def test_dry_run_writes_nothing(self):
+        User.objects.create_user(username="t@example.com", password="pw")
+        out, _ = self.run_import(
+            "usn,student_name,year,department,case_type,date,created_by\n"
+            "1AB21CS001,Asha,3,CSE,Late Arrival,2023-02-01,t@example.com\n",
+            "--dry-run",
+        )
+        self.assertIn("Validated 1 row(s)", out)
+        self.assertFalse(Case.objects.exists())
+
+
+class ExportCasesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username="c@example.com", password="pw", is_staff=True)
+        make_case(cls.staff, usn="1AB21CS001", department="CSE")
+        make_case(cls.staff, usn="1AB21EC001", department="ECE")
+
+    def test_streams_filtered_csv(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("export_cases"), {"department": "ECE"})
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "usn", "student_name"])
+        self.assertEqual(len(lines), 2)
+        self.assertIn("1AB21EC001", lines[1])
+
+    def test_streams_ndjson(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("export_cases"), {"format": "ndjson"})
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([r["usn"] for r in rows], ["1AB21CS001", "1AB21EC001"])
+        self.assertEqual(rows[0]["created_by"], "c@example.com")
+
+    def test_requires_staff(self):
+        self.client.force_login(User.objects.create_user(username="t@example.com", password="pw"))
+        response = self.client.get(reverse("export_cases"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_management_command_writes_export(self):
+        out = io.StringIO()
+        call_command("export_cases", "--format", "ndjson", "--department", "CSE", stdout=out)
+        self.assertEqual(json.loads(out.getvalue())["usn"], "1AB21CS001")
+
+
+class StudentDirectoryTests(TestCase):
+
+    def setUp(self):
+        directory.clear()
+        self.addCleanup(directory.clear)
+        self.students = [
+            Student.objects.create(
+                usn=f"1AB21CS00{i}", name=f"Student {i}", email=f"s{i}@example.com",
+                department="CSE", year="3", password="pw",
+            )
+            for i in range(3)
+        ]
+
+    def test_repeat_lookups_are_served_from_cache(self):
+        url = reverse("get_student")
+        self.assertEqual(self.client.get(url, {"usn": "1AB21CS001"}).json()["name"], "Student 1")
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {"usn": "1AB21CS001"})
+        self.assertEqual(response.json()["email"], "s1@example.com")
+
+    def test_save_and_delete_invalidate_entry(self):
+        directory.get_student("1AB21CS001")
+        student = self.students[1]
+        student.name = "Renamed"
+        student.save()
+        self.assertEqual(directory.get_student("1AB21CS001")["name"], "Renamed")
+        student.delete()
+        self.assertIsNone(directory.get_student("1AB21CS001"))
+
+    def test_batch_lookup_uses_one_query(self):
+        usns = {"usns": ["1AB21CS000", "1AB21CS001", "1AB21CS002", "NOPE"]}
+        self.assertEqual(
+            self.client.post(reverse("get_students"), usns, content_type="application/json").status_code, 403
+        )
+        self.client.force_login(User.objects.create_user(username="t@example.com", password="pw"))
+        directory.get_student("1AB21CS000")
+        # session and user, the teacher check, then one for the directory
+        # misses and one for the prior case counts
+        with self.assertNumQueries(5):
+            response = self.client.post(reverse("get_students"), usns, content_type="application/json")
+        data = response.json()
+        self.assertEqual(sorted(data["students"]), ["1AB21CS000", "1AB21CS001", "1AB21CS002"])
+        self.assertEqual(data["missing"], ["NOPE"])
+
+    def test_students_cannot_read_teacher_only_data(self):
+        user = User.objects.create_user(username="1AB21CS001", password="pw")
+        StudentProfile.objects.create(user=user, usn="1AB21CS001")
+        self.client.force_login(user)
+        self.assertNotIn("prior_cases", self.client.get(reverse("get_student"), {"usn": "1AB21CS002"}).json())
+        response = self.client.get(reverse("get_students"), {"usns": "1AB21CS000,1AB21CS002"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_prior_case_counts_follow_case_writes(self):
+        teacher = User.objects.create_user(username="t@example.com", password="pw")
+        url = reverse("get_student")
+        # disciplinary history is for teachers only
+        self.assertNotIn("prior_cases", self.client.get(url, {"usn": "1AB21CS001"}).json())
+        self.client.force_login(teacher)
+        first = self.client.get(url, {"usn": "1AB21CS001"})
+        self.assertEqual(first.json()["prior_cases"]["Late Arrival"], 0)
+
+        make_case(teacher, usn="1AB21CS001")
+        case = make_case(teacher, usn="1AB21CS001")
+        response = self.client.get(url, {"usn": "1AB21CS001"}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["prior_cases"], {
+            "Late Arrival": 2, "Academic Misconduct": 0, "Uniform Violation": 0, "Other": 0,
+        })
+
+        case.case_type = "Other"
+        case.save()
+        StudentCaseCounter.objects.update(count=99)
+        call_command("rebuild_student_counters", stdout=io.StringIO())
+        counts = self.client.get(url, {"usn": "1AB21CS001"}).json()["prior_cases"]
+        self.assertEqual((counts["Late Arrival"], counts["Other"]), (1, 1))
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = directory.LRUCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+
+
+class TeacherCaseStatsTests(TestCase):
+
+    def setUp(self):
+        clear_dashboards()  # rendered dashboards are keyed by ids the rollback reuses
+        self.teacher = User.objects.create_user(username="t@example.com", password="pw")
+
+    def stats(self):
+        return TeacherCaseStats.objects.get(user=self.teacher)
+
+    def test_counters_follow_creates_updates_and_deletes(self):
+        late = make_case(self.teacher)
+        other = make_case(self.teacher, case_type="Other")
+        self.assertEqual((self.stats().total, self.stats().late_arrival, self.stats().other), (2, 1, 1))
+
+        late.case_type = "Academic Misconduct"
+        late.save()
+        stats = self.stats()
+        self.assertEqual((stats.total, stats.late_arrival, stats.academic_misconduct), (2, 0, 1))
+
+        other.delete()
+        self.assertEqual((self.stats().total, self.stats().other), (1, 0))
+
+    def test_clear_complaints_and_rebuild(self):
+        for _ in range(3):
+            make_case(self.teacher)
+        call_command("clear_complaints", stdout=io.StringIO())
+        self.assertEqual(self.stats().total, 0)
+
+        make_case(self.teacher, case_type="Other")
+        TeacherCaseStats.objects.update(total=99)
+        call_command("rebuild_case_stats", stdout=io.StringIO())
+        self.assertEqual((self.stats().total, self.stats().other), (1, 1))
+
+    def test_dashboard_total_is_a_single_row_read(self):
+        make_case(self.teacher)
+        make_case(self.teacher)
+        self.client.force_login(self.teacher)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("teacher_dashboard"))
+        self.assertEqual(response.context["total_cases"], 2)
+        self.assertFalse([q for q in captured.captured_queries if "COUNT(" in q["sql"]])
+
+
+class CaseAnalyticsTests(TestCase):
+
+    def setUp(self):
+        clear_dashboards()
+        self.teacher = User.objects.create_user(username="t@example.com", password="pw")
+        self.client.force_login(self.teacher)
+
+    def counts(self, **params):
+        response = self.client.get(reverse("api_case_analytics"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_rollups_follow_case_writes(self):
+        late = make_case(self.teacher)
+        make_case(self.teacher, department="ECE", date=datetime.date(2026, 2, 3))
+        make_case(self.teacher, case_type="Other", date=datetime.date(2026, 2, 20))
+        self.assertEqual(self.counts(group_by="month")["groups"], [
+            {"month": "2026-01", "count": 1}, {"month": "2026-02", "count": 2},
+        ])
+
+        late.department = "ECE"
+        late.save()
+        self.assertEqual(self.counts(department="ECE")["total"], 2)
+        late.delete()
+        call_command("clear_complaints", "--department", "ECE", stdout=io.StringIO())
+        self.assertEqual(self.counts(group_by="department,case_type")["groups"], [
+            {"department": "CSE", "case_type": "Other", "count": 1},
+        ])
+
+    def test_slices_come_from_the_rollups(self):
+        for month in (1, 2, 3):
+            make_case(self.teacher, date=datetime.date(2026, month, 10))
+        make_case(self.teacher, year="1", case_type="Other", date=datetime.date(2026, 2, 1))
+        with CaptureQueriesContext(connection) as captured:
+            data = self.counts(month_from="2026-02", month_to="2026-03", case_type="Late Arrival,Other", group_by="year")
+        self.assertEqual(data["groups"], [{"year": "1", "count": 1}, {"year": "3", "count": 2}])
+        self.assertFalse([q for q in captured.captured_queries if f'FROM "{CASE_TABLE}"' in q["sql"]])
+
+        response = self.client.get(reverse("api_case_analytics"), {"group_by": "teacher"})
+        self.assertEqual(response.status_code, 400)
+        page = self.client.get(reverse("committee"))
+        self.assertEqual(page.context["counts"]["total"], 4)
+
+    def test_rebuild_command(self):
+        make_case(self.teacher)
+        CaseRollup.objects.update(count=99)
+        call_command("rebuild_case_rollups", stdout=io.StringIO())
+        self.assertEqual(self.counts()["total"], 1)
+
+
+class BatchCaseApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="t@example.com", password="pw")
+        Student.objects.create(
+            usn="1AB21CS001", name="Directory Name", email="s@example.com",
+            department="CSE", year="3", password="pw",
+        )
+
+    def setUp(self):
+        clear_dashboards()
+        self.client.force_login(self.teacher)
+
+    def post(self, body):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.client.post(reverse("api_create_cases"), json.dumps(body), content_type="application/json")
+
+    def test_students_cannot_file_cases_or_read_analytics(self):
+        user = User.objects.create_user(username="1AB21CS001", password="pw")
+        StudentProfile.objects.create(user=user, usn="1AB21CS001")
+        self.client.force_login(user)
+        response = self.post([{"usn": "1AB21CS001", "case_type": "Other", "date": "2026-01-15"}])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Case.objects.exists())
+        self.assertEqual(self.client.get(reverse("api_case_analytics")).status_code, 403)
+        self.assertEqual(self.client.get(reverse("committee")).status_code, 302)
+
+    def test_reports_per_item_results_and_inserts_once(self):
+        cases = [
+            {"usn": "1AB21CS001", "case_type": "Late Arrival", "date": "2026-01-15", "student_name": "Ignored"},
+            {"usn": "1AB21CS002", "case_type": "Bogus", "date": "2026-01-15"},
+            {"usn": "1AB21CS099", "case_type": "Uniform Violation", "date": "2026-01-16",
+             "name": "Walk In", "year": "3", "department": "CSE", "violations": ["No ID card"]},
+            # clients may only use departments and years already on file
+            {"usn": "1AB21CS098", "case_type": "Other", "date": "2026-01-16",
+             "name": "Walk In", "year": "3", "department": "Nowhere Studies"},
+        ]
+        with CaptureQueriesContext(connection) as captured:
+            response = self.post({"cases": cases})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["created"], data["failed"]), (2, 2))
+        self.assertEqual([r["status"] for r in data["results"]], ["created", "invalid", "created", "invalid"])
+        self.assertEqual(set(data["results"][1]["errors"]), {"case_type", "student_name", "year", "department"})
+        self.assertEqual(set(data["results"][3]["errors"]), {"department"})
+        self.assertFalse(Code.objects.filter(label="Nowhere Studies").exists())
+
+        inserts = [q for q in captured.captured_queries if q["sql"].startswith(f'INSERT INTO "{CASE_TABLE}"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Case.objects.get(pk=data["results"][0]["id"]).student_name, "Directory Name")
+        walk_in = Case.objects.get(pk=data["results"][2]["id"])
+        self.assertEqual(walk_in.description, "Violations: No ID card\nOther: ")
+        stats = TeacherCaseStats.objects.get(user=self.teacher)
+        self.assertEqual((stats.total, stats.late_arrival, stats.uniform_violation), (2, 1, 1))
+
+    def test_client_keys_make_resending_idempotent(self):
+        cases = [
+            {"usn": "1AB21CS001", "case_type": "Other", "date": "2026-01-15", "client_key": "k-1"},
+            {"usn": "1AB21CS001", "case_type": "Other", "date": "2026-01-15", "client_key": "k-2"},
+            {"usn": "1AB21CS001", "case_type": "Other", "date": "2026-01-15", "client_key": "k-1"},
+        ]
+        first = self.post(cases).json()
+        self.assertEqual((first["created"], first["duplicates"]), (2, 1))
+        self.assertEqual(first["results"][2]["id"], first["results"][0]["id"])
+
+        with CaptureQueriesContext(connection) as captured:
+            again = self.post(cases + [{**cases[0], "client_key": "k-3"}])
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual([r["status"] for r in again.json()["results"]], ["duplicate"] * 3 + ["created"])
+        self.assertEqual([r["id"] for r in again.json()["results"][:2]], [r["id"] for r in first["results"][:2]])
+        inserts = [q for q in captured.captured_queries if q["sql"].startswith(f'INSERT INTO "{CASE_TABLE}"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Case.objects.count(), 3)
+        self.assertEqual(TeacherCaseStats.objects.get(user=self.teacher).other, 3)
+
+    def test_key_filed_by_a_concurrent_sync_is_a_duplicate(self):
+        filed = make_case(self.teacher, client_key="k-1")
+        item = {"usn": "1AB21CS001", "case_type": "Other", "date": "2026-01-15", "client_key": "k-1"}
+        # the first key lookup misses it, as if the other sync committed just after
+        with mock.patch.object(Case.objects, "filter", side_effect=[Case.objects.none(), Case.objects.filter(client_key="k-1")]):
+            results = ingest.ingest_cases([item], self.teacher)
+        self.assertEqual(results, [{"index": 0, "status": "duplicate", "id": filed.pk}])
+
+    def test_rejects_bad_batches(self):
+        self.assertEqual(self.post([{"usn": "1AB21CS001", "date": "soon"}]).status_code, 400)
+        self.assertEqual(self.post({"cases": []}).status_code, 400)
+        impossible = self.post([{"usn": "1AB21CS001", "case_type": "Other", "date": "2024-02-30"}])
+        self.assertEqual(impossible.status_code, 400)
+        self.assertIn("date", impossible.json()["results"][0]["errors"])
+        self.client.logout()
+        self.assertEqual(self.post([]).status_code, 403)
+        self.assertFalse(Case.objects.exists())
+
+    def test_case_forms_share_the_ingestion_path(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = self.client.post(reverse("case_late"), {
+                "usn": "1AB21CS001", "name": "Ignored", "date": "2026-01-15", "reason": " Bus ",
+            })
+            self.assertRedirects(response, reverse("teacher_dashboard"), fetch_redirect_response=False)
+            invalid = self.client.post(reverse("case_others"), {"usn": "1AB21CS001", "date": ""})
+        self.assertEqual(invalid.status_code, 400)
+        case = Case.objects.get()
+        self.assertEqual((case.student_name, case.description), ("Directory Name", "Bus"))
+        self.assertEqual(TeacherCaseStats.objects.get(user=self.teacher).late_arrival, 1)
+
+
+class ClearComplaintsCommandTests(TestCase):
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(username="teacher", password="pw")
+        fd, self.checkpoint = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        os.unlink(self.checkpoint)
+        self.addCleanup(lambda: os.path.exists(self.checkpoint) and os.unlink(self.checkpoint))
+
+    def clear(self, *args):
+        out = io.StringIO()
+        call_command("clear_complaints", "--checkpoint", self.checkpoint, *args, stdout=out)
+        return out.getvalue()
+
+    def test_filtered_delete_in_chunks_keeps_counters(self):
+        for _ in range(5):
+            make_case(self.teacher, date=datetime.date(2024, 1, 1))
+        keep = make_case(self.teacher, case_type="Other", date=datetime.date(2024, 1, 1))
+        recent = make_case(self.teacher, date=datetime.date(2025, 1, 1))
+
+        self.assertIn("5 complaint(s) would be deleted",
+                      self.clear("--case-type", "Late Arrival", "--before", "2025-01-01", "--dry-run"))
+        self.assertEqual(Case.objects.count(), 7)
+
+        output = self.clear("--case-type", "Late Arrival", "--before", "2025-01-01", "--chunk-size", "2")
+        self.assertIn("Successfully deleted 5", output)
+        self.assertEqual(set(Case.objects.values_list("id", flat=True)), {keep.id, recent.id})
+        stats = TeacherCaseStats.objects.get(user=self.teacher)
+        self.assertEqual((stats.total, stats.late_arrival, stats.other), (2, 1, 1))
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resume_continues_from_checkpoint(self):
+        cases = [make_case(self.teacher) for _ in range(4)]
+        with open(self.checkpoint, "w") as handle:
+            json.dump({"filters": {}, "last_id": cases[1].id, "upper": cases[2].id}, handle)
+        self.assertIn("Successfully deleted 1", self.clear("--resume"))
+        self.assertEqual(list(Case.objects.order_by("id").values_list("id", flat=True)),
+                         [cases[0].id, cases[1].id, cases[3].id])
+
+
+class CaseStudentLinkTests(TestCase):
+
+    def setUp(self):
+        clear_dashboards()
+        self.teacher = User.objects.create_user(username="teacher", password="pw")
+        fd, self.checkpoint = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        os.unlink(self.checkpoint)
+        self.addCleanup(lambda: os.path.exists(self.checkpoint) and os.unlink(self.checkpoint))
+
+    def link(self, *args):
+        out = io.StringIO()
+        call_command("link_case_students", "--checkpoint", self.checkpoint, *args, stdout=out)
+        return out.getvalue()
+
+    def test_backfill_links_known_usns_in_chunks(self):
+        cases = [make_case(self.teacher, usn=f"1AB21CS00{i % 3}") for i in range(6)]
+        # registering links the cases filed before; undo that to backfill
+        student = Student.objects.create(usn="1AB21CS001", name="Linked", email="l@example.com", password="pw")
+        self.assertEqual(student.cases.count(), 2)
+        Case.objects.update(student=None)
+
+        self.assertIn("2 case(s) would be linked", self.link("--dry-run"))
+        self.assertIn("Linked 2 case(s)", self.link("--chunk-size", "4"))
+        self.assertEqual(set(student.cases.values_list("id", flat=True)), {cases[1].id, cases[4].id})
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+        Case.objects.update(student=None)
+        with open(self.checkpoint, "w") as handle:
+            json.dump({"last_id": cases[1].id, "upper": cases[-1].id}, handle)
+        self.assertIn("Linked 1 case(s)", self.link("--resume"))
+
+    def test_new_cases_are_linked_and_shown_by_name(self):
+        student = Student.objects.create(
+            usn="1AB21CS001", name="Directory Name", email="l@example.com", department="CSE", year="3", password="pw",
+        )
+        results = ingest.ingest_cases(
+            [{"usn": "1AB21CS001", "case_type": "Other", "date": "2026-01-15"}], self.teacher,
+        )
+        self.assertEqual(Case.objects.get(pk=results[0]["id"]).student_id, student.id)
+
+        Case.objects.update(student_name="Old copy")
+        student.name = "Renamed"
+        student.save()
+        self.client.force_login(self.teacher)
+        self.assertContains(self.client.get(reverse("teacher_dashboard")), "Renamed")
+        student.delete()
+        self.assertEqual(Case.objects.get().student_id, None)
+
+
+class CodedLabelTests(TestCase):
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(username="t@example.com", password="pw")
+
+    def test_labels_are_stored_once_as_codes(self):
+        case = make_case(self.teacher, department="Mechanical")
+        make_case(self.teacher, department="Mechanical")
+        code = Code.objects.get(kind=codes.DEPARTMENT, label="Mechanical").code
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT DISTINCT department FROM "{CASE_TABLE}"')
+            self.assertEqual(cursor.fetchall(), [(code,)])
+        case.refresh_from_db()
+        self.assertEqual(case.department, "Mechanical")
+        self.assertEqual(list(Case.objects.values_list("department", flat=True).distinct()), ["Mechanical"])
+
+    def test_filters_compare_codes(self):
+        make_case(self.teacher, case_type="Other", year="2")
+        self.assertEqual(Case.objects.filter(case_type="Other", year="2").count(), 1)
+        self.assertEqual(Case.objects.filter(case_type__in=["Other", "Late Arrival"]).count(), 1)
+        # an unknown label matches nothing and is not added
+        self.assertFalse(Case.objects.filter(department="Nowhere").exists())
+        self.assertFalse(Code.objects.filter(label="Nowhere").exists())
+
+    def test_each_kind_has_a_bounded_number_of_labels(self):
+        make_case(self.teacher)
+        with mock.patch.object(codes, "MAX_LABELS", Code.objects.filter(kind=codes.DEPARTMENT).count()):
+            with self.assertRaises(codes.LabelError):
+                make_case(self.teacher, department="One Too Many")
+        self.assertFalse(Code.objects.filter(label="One Too Many").exists())
+
+    def test_labels_are_resolved_from_the_cache(self):
+        make_case(self.teacher)
+        Case.objects.get()
+        with self.assertNumQueries(1):
+            case = Case.objects.get()
+        self.assertEqual((case.department, case.year, case.case_type), ("CSE", "3", "Late Arrival"))
+
+
+class CaseSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username="c@example.com", password="pw", is_staff=True)
+        cls.library = make_case(cls.staff, description="Caught using a phone in the library during exam")
+        cls.canteen = make_case(cls.staff, description="Argument near the canteen")
+        cls.edited = make_case(cls.staff, description="Left the library early")
+
+    def search(self, q, **params):
+        self.client.force_login(self.staff)
+        return self.client.get(reverse("api_search_cases"), {"q": q, **params}).json()["results"]
+
+    def test_finds_ranked_matches_with_snippets(self):
+        results = self.search("library")
+        self.assertEqual({r["id"] for r in results}, {self.library.id, self.edited.id})
+        self.assertIn("[library]", results[0]["snippet"])
+        self.assertEqual(results[0]["case_type"], "Late Arrival")
+
+    def test_index_follows_updates_and_deletes(self):
+        self.edited.description = "Left the canteen early"
+        self.edited.save()
+        self.canteen.delete()
+        self.assertEqual([r["id"] for r in self.search("canteen")], [self.edited.id])
+        self.assertEqual([r["id"] for r in self.search("library")], [self.library.id])
+
+    def test_updates_to_other_columns_leave_the_index_alone(self):
+        def changes():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT total_changes()")
+                return cursor.fetchone()[0]
+
+        before = changes()
+        Case.objects.filter(id=self.library.id).update(date=datetime.date(2026, 2, 1))
+        # just the case row; the _au trigger would add its index writes
+        self.assertEqual(changes() - before, 1)
+        self.assertEqual(len(self.search("library")), 2)
+
+    def test_user_input_is_not_parsed_as_query_syntax(self):
+        self.assertEqual(self.search('phone" OR (library'), [])
+        self.assertEqual(len(self.search("phone exam")), 1)
+
+    def test_searches_uniform_violations(self):
+        UniformViolation.objects.create(
+            usn="1AB21CS001", name="Asha", year="3", department="CSE",
+            date=datetime.date(2026, 1, 1), prior_count=0, violations="No ID card",
+        )
+        self.assertEqual(self.search("card", type="violations")[0]["name"], "Asha")
+
+    def test_rebuild_command(self):
+        call_command("rebuild_search_index", "--optimize", stdout=io.StringIO())
+        self.assertEqual(len(self.search("library")), 2)
+
+
+class StudentEventsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="t@example.com", password="pw")
+        cls.student = Student.objects.create(
+            usn="1AB21CS001", name="Test Student", email="s@example.com",
+            department="CSE", year="3", password="pw",
+        )
+        cls.old_case = make_case(cls.teacher)
+
+    def login_student(self, client):
+        session = client.session
+        session["student_id"] = self.student.id
+        session.save()
+        client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+    def test_wsgi_poll_returns_cases_after_last_event_id(self):
+        self.login_student(self.client)
+        first = self.client.get(reverse("student_events")).content.decode()
+        self.assertIn(f"id: {self.old_case.id}\nevent: ready", first)
+
+        new_case = make_case(self.teacher, description="new")
+        make_case(self.teacher, usn="1AB21CS999")
+        response = self.client.get(reverse("student_events"), HTTP_LAST_EVENT_ID=str(self.old_case.id))
+        body = response.content.decode()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertIn(f"id: {new_case.id}\nevent: case", body)
+        self.assertEqual(body.count("event: case"), 1)
+
+    async def test_asgi_stream_is_woken_by_new_case(self):
+        await sync_to_async(self.login_student)(self.async_client)
+        response = await self.async_client.get(reverse("student_events"))
+        stream = aiter(response.streaming_content)
+        self.assertIn(b"event: ready", await anext(stream))
+
+        def file_case():
+            with self.captureOnCommitCallbacks(execute=True):
+                return make_case(self.teacher, description="pushed")
+
+        new_case = await sync_to_async(file_case)()
+        message = (await asyncio.wait_for(anext(stream), timeout=5)).decode()
+        self.assertIn(f"id: {new_case.id}\nevent: case", message)
+        self.assertIn('"pushed"', message)
+        await stream.aclose()
+
+    async def test_asgi_stream_catches_up_before_waiting(self):
+        await sync_to_async(self.login_student)(self.async_client)
+        new_case = await sync_to_async(make_case)(self.teacher, description="missed")
+        response = await self.async_client.get(
+            reverse("student_events"), headers={"Last-Event-ID": str(self.old_case.id)},
+        )
+        stream = aiter(response.streaming_content)
+        self.assertIn(b"event: ready", await anext(stream))
+        # read before the stream starts waiting, which does not query
+        self.assertIn(f"id: {new_case.id}\nevent: case".encode(), await anext(stream))
+        await stream.aclose()
+
+
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="t@example.com", password="pw")
+        cls.student = Student.objects.create(
+            usn="1AB21CS001", name="Test Student", email="s@example.com",
+            department="CSE", year="3", password="pw",
+        )
+
+    def setUp(self):
+        clear_dashboards()  # rendered dashboards are keyed by ids the rollback reuses
+        directory.clear()
+        self.addCleanup(directory.clear)
+
+    def assertRevalidates(self, url, params=None, change=None):
+        first = self.client.get(url, params)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        repeat = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(repeat.status_code, 304)
+        if change:
+            change()
+            self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_get_student(self):
+        def rename():
+            self.student.name = "Renamed"
+            self.student.save()
+        self.assertRevalidates(reverse("get_student"), {"usn": "1AB21CS001"}, rename)
+
+    def test_student_dashboard(self):
+        login_student(self.client, self.student)
+        self.assertRevalidates(reverse("student_dashboard"), change=lambda: make_case(self.teacher))
+
+    def test_teacher_dashboard(self):
+        self.client.force_login(self.teacher)
+        self.assertRevalidates(reverse("teacher_dashboard"), change=lambda: make_case(self.teacher))
+
+    def test_profile_api(self):
+        user = User.objects.create_user(username="1AB21CS002", password="pw")
+        profile = StudentProfile.objects.create(user=user, usn="1AB21CS002")
+        self.client.force_login(user)
+
+        def edit():
+            profile.phone = "12345"
+            profile.save()
+        self.assertRevalidates(reverse("api_get_profile"), change=edit)
+
+    def test_dashboard_html_is_compressed(self):
+        for i in range(10):
+            make_case(self.teacher, description="x" * 50)
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse("teacher_dashboard"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+
+class ActivityRecorderTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="1AB21CS001", email="s@example.com", password="pw")
+        StudentProfile.objects.create(user=self.user, usn="1AB21CS001")
+        self.addCleanup(activity.recorder.flush)
+
+    def login(self):
+        return self.client.post(
+            reverse("api_student_login"), {"usn": "1AB21CS001", "password": "pw"},
+            content_type="application/json",
+        )
+
+    def test_login_does_not_write_activity_but_returns_it(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.login()
+        self.assertFalse([q for q in captured.captured_queries if "INSERT" in q["sql"] and "activity" in q["sql"]])
+        self.assertEqual(response.json()["activities"][0]["action"], "logged in")
+        self.assertFalse(Activity.objects.exists())
+
+    def test_flushes_in_one_insert_when_batch_is_full(self):
+        with override_settings(ACTIVITY_BUFFER_SIZE=3):
+            self.login()
+            self.login()
+            self.assertEqual(Activity.objects.count(), 0)
+            with CaptureQueriesContext(connection) as captured:
+                self.login()
+        inserts = [q for q in captured.captured_queries if q["sql"].startswith("INSERT") and "activity" in q["sql"]]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Activity.objects.filter(user=self.user).count(), 3)
+
+    def test_flushes_when_oldest_entry_is_too_old(self):
+        activity.record(self.user, "logged in")
+        with override_settings(ACTIVITY_FLUSH_INTERVAL=0):
+            self.client.get(reverse("home"))
+        self.assertEqual(Activity.objects.count(), 1)
+
+    def test_unbuffered_mode_writes_immediately(self):
+        with override_settings(ACTIVITY_BUFFERING=False):
+            activity.record(self.user, "logged in")
+        self.assertEqual(Activity.objects.count(), 1)
+
+    def test_rows_that_cannot_be_written_are_dropped(self):
+        activity.record(self.user, "logged in")
+        activity.record(self.user, None)  # NOT NULL violation
+        with self.assertLogs("DisciplineCommittee.activity", "ERROR"):
+            self.assertEqual(activity.recorder.flush(), 1)
+        self.assertEqual(activity.recorder.pending_for(self.user.pk), [])
+        self.assertEqual(Activity.objects.get().action, "logged in")
+
+    def test_locked_database_keeps_the_batch(self):
+        activity.record(self.user, "logged in")
+        locked = OperationalError("database is locked")
+        with mock.patch.object(Activity.objects, "bulk_create", side_effect=locked), self.assertLogs(
+            "DisciplineCommittee.activity", "WARNING"
+        ):
+            self.assertEqual(activity.recorder.flush(), 0)
+        self.assertEqual(len(activity.recorder.pending_for(self.user.pk)), 1)
+        self.assertEqual(activity.recorder.flush(), 1)
+
+    @override_settings(ACTIVITY_FLUSH_INTERVAL=0.05)
+    def test_idle_worker_flushes_on_a_timer(self):
+        recorder = activity.ActivityRecorder()
+        flushed = threading.Event()
+
+        def flush():
+            recorder._pending.clear()
+            flushed.set()
+
+        with mock.patch.object(recorder, "flush", side_effect=flush):
+            recorder.record(self.user, "logged in")
+            self.assertTrue(flushed.wait(5))
+
+
+class ActivityHistoryTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="1AB21CS001", password="pw")
+        self.addCleanup(activity.recorder.flush)
+
+    def add_activities(self, count):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        Activity.objects.bulk_create(
+            Activity(user=self.user, action=f"action {i}", timestamp=now - datetime.timedelta(minutes=count - i))
+            for i in range(count)
+        )
+
+    @override_settings(ACTIVITY_HISTORY_LIMIT=3, ACTIVITY_BUFFER_SIZE=1)
+    def test_prune_keeps_latest_entries_and_archives_the_rest(self):
+        self.add_activities(4)
+        activity.record(self.user, "newest")
+        activity.recorder.flush()
+        # flushing leaves pruning to the command
+        self.assertEqual(Activity.objects.filter(user=self.user).count(), 5)
+
+        call_command("prune_activity", stdout=io.StringIO())
+        self.assertEqual(
+            list(Activity.objects.filter(user=self.user).values_list("action", flat=True)),
+            ["newest", "action 3", "action 2"],
+        )
+        self.assertEqual(
+            sorted(ActivityArchive.objects.values_list("action", flat=True)),
+            ["action 0", "action 1"],
+        )
+
+    def test_prune_command_without_archive(self):
+        self.add_activities(5)
+        out = io.StringIO()
+        call_command("prune_activity", "--keep", "2", "--no-archive", stdout=out)
+        self.assertIn("Deleted 3", out.getvalue())
+        self.assertEqual(Activity.objects.count(), 2)
+        self.assertFalse(ActivityArchive.objects.exists())
+
+    def test_latest_activities_use_user_index(self):
+        sql, params = Activity.objects.filter(user=self.user).order_by("-timestamp", "-id")[:10].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("activity_user_time_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+
+class LockRetryTests(SimpleTestCase):
+
+    def flaky(self, failures, message="database is locked"):
+        calls = []
+
+        def write():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise OperationalError(message)
+            return "ok"
+        return write, calls
+
+    @override_settings(DB_LOCK_RETRIES=3, DB_LOCK_BACKOFF=0)
+    def test_retries_lock_errors_with_backoff(self):
+        write, calls = self.flaky(2)
+        with self.assertLogs("DisciplineCommittee.db", "WARNING"):
+            self.assertEqual(db.retry_on_locked(write)(), "ok")
+        self.assertEqual(len(calls), 3)
+
+    @override_settings(DB_LOCK_RETRIES=1, DB_LOCK_BACKOFF=0)
+    def test_gives_up_and_ignores_other_errors(self):
+        write, calls = self.flaky(5)
+        with self.assertRaises(OperationalError), self.assertLogs("DisciplineCommittee.db", "WARNING"):
+            db.call_with_retry(write)
+        self.assertEqual(len(calls), 2)
+
+        write, calls = self.flaky(1, message="no such table")
+        with self.assertRaises(OperationalError):
+            db.call_with_retry(write)
+        self.assertEqual(len(calls), 1)
+
+    def test_write_benchmark_runs_both_profiles(self):
+        out = io.StringIO()
+        call_command("bench_sqlite_writes", "--writers", "2", "--readers", "1", "--transactions", "5", stdout=out)
+        self.assertIn("default:", out.getvalue())
+        self.assertIn("production: ", out.getvalue())
+        self.assertIn("10 committed", out.getvalue())
+
+
+@override_settings(REPLICA_DATABASE="replica")
+class ReplicaRouterTests(TestCase):
+
+    def setUp(self):
+        self.addCleanup(activity.recorder.flush)
+        self.router = replicas.ReplicaRouter()
+        self.reads = []
+
+        @replicas.replica_reads
+        def view(request, write=False):
+            self.reads.append(self.router.db_for_read(Case))
+            if write:
+                self.router.db_for_write(Case)
+                self.reads.append(self.router.db_for_read(Case))
+            return HttpResponse()
+        self.view = view
+
+    def test_only_marked_views_read_from_replica(self):
+        self.assertEqual(self.router.db_for_read(Case), "default")
+        self.view(None)
+        self.assertEqual(self.reads, ["default"])  # TestCase holds an atomic block open
+
+    def test_reads_after_a_write_stay_on_primary(self):
+        with mock.patch.object(replicas.connections["default"], "in_atomic_block", False):
+            self.view(None, write=True)
+        self.assertEqual(self.reads, ["replica", "default"])
+        self.assertEqual(self.router.db_for_write(Case), "default")
+
+    def test_write_sets_pin_cookie_and_cookie_pins_reads(self):
+        response = self.client.post(
+            reverse("api_student_register"), {"usn": "1AB21CS009", "email": "n@example.com", "password": "pw"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.cookies[settings.REPLICA_PIN_COOKIE]["max-age"], settings.REPLICA_PIN_SECONDS)
+
+        middleware = replicas.ReplicaPinningMiddleware(lambda request: self.view(request) or HttpResponse())
+        request = RequestFactory().get("/", HTTP_COOKIE=f"{settings.REPLICA_PIN_COOKIE}=1")
+        with mock.patch.object(replicas.connections["default"], "in_atomic_block", False):
+            middleware(request)
+        self.assertEqual(self.reads, ["default"])
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000, LOGIN_THROTTLE_IDENTITY=(2, 300))
+class LoginThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(activity.recorder.flush)
+        self.user = User.objects.create_user(username="1AB21CS001", email="s@example.com", password="pw")
+        StudentProfile.objects.create(user=self.user, usn="1AB21CS001")
+
+    def login(self, password="pw"):
+        return self.client.post(
+            reverse("api_student_login"), {"usn": "1AB21CS001", "password": password},
+            content_type="application/json",
+        )
+
+    def test_rejects_before_hashing_once_bucket_is_empty(self):
+        self.login("wrong")
+        self.login("wrong")
+        with mock.patch.object(throttle, "authenticate") as authenticate:
+            response = self.login()
+        authenticate.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+        out = io.StringIO()
+        call_command("login_stats", stdout=out)
+        self.assertIn("attempts 2 (succeeded 0, failed 2), throttled 1", out.getvalue())
+
+    def test_teacher_login_is_throttled_by_ip(self):
+        with override_settings(LOGIN_THROTTLE_IP=(1, 60)):
+            self.client.post(reverse("teacher_login"), {"email": "a@example.com", "password": "x"})
+            response = self.client.post(reverse("teacher_login"), {"email": "b@example.com", "password": "x"})
+        self.assertEqual(response.status_code, 429)
+
+    def test_changed_iteration_count_rehashes_on_login(self):
+        self.assertIn("$1000$", self.user.password)
+        with override_settings(PASSWORD_HASH_ITERATIONS=1200):
+            self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1200$"))
+
+
+class SessionStorageTests(TestCase):
+
+    def test_clear_expired_sessions_in_batches(self):
+        from django.contrib.sessions.models import Session
+        past = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=1)
+        Session.objects.bulk_create(
+            Session(session_key=f"expired{i:03d}", session_data="x", expire_date=past) for i in range(5)
+        )
+        Session.objects.create(session_key="live", session_data="x",
+                               expire_date=past + datetime.timedelta(days=30))
+        out = io.StringIO()
+        call_command("clear_expired_sessions", "--batch-size", "2", stdout=out)
+        self.assertIn("Deleted 5", out.getvalue())
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["live"])
+
+    def test_benchmark_shows_no_session_queries_for_cookie_sessions(self):
+        out = io.StringIO()
+        call_command("bench_session_queries", "--requests", "3", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 8)
+        db_line = next(line for line in lines if line.strip().startswith("db student"))
+        cookie_line = next(line for line in lines if line.strip().startswith("signed_cookies student"))
+        self.assertNotIn("(0.0 on django_session)", db_line)
+        self.assertIn("(0.0 on django_session)", cookie_line)
+        self.assertFalse(Student.objects.filter(usn="BENCH0000001").exists())
+
+
+@override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cache")
+class DashboardCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="t@example.com", password="pw")
+        cls.student = Student.objects.create(
+            usn="1AB21CS001", name="Test Student", email="s@example.com",
+            department="CSE", year="3", password="pw",
+        )
+        make_case(cls.teacher)
+
+    def setUp(self):
+        clear_dashboards()
+
+    def test_hot_student_dashboard_runs_no_queries(self):
+        login_student(self.client, self.student)
+        self.client.get(reverse("student_dashboard"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("student_dashboard"))
+        self.assertContains(response, "Test Student")
+
+    def test_hot_teacher_dashboard_only_loads_the_user(self):
+        self.client.force_login(self.teacher)
+        self.client.get(reverse("teacher_dashboard"))
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse("teacher_dashboard"))
+        self.assertEqual([q["sql"].split(" FROM ")[1].split()[0] for q in captured.captured_queries],
+                         ['"auth_user"'])
+
+    def test_case_writes_and_renames_invalidate(self):
+        login_student(self.client, self.student)
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.client.get(reverse("student_dashboard")).context["total_complaints"], 1)
+        self.assertEqual(self.client.get(reverse("teacher_dashboard")).context["total_cases"], 1)
+
+        make_case(self.teacher)
+        self.assertEqual(self.client.get(reverse("student_dashboard")).context["total_complaints"], 2)
+        self.assertEqual(self.client.get(reverse("teacher_dashboard")).context["total_cases"], 2)
+
+        self.student.name = "Renamed Student"
+        self.student.save()
+        self.assertContains(self.client.get(reverse("student_dashboard")), "Renamed Student")
+
+    @override_settings(REPLICA_DATABASE="replica", REPLICA_PIN_SECONDS=0.2)
+    def test_bumps_again_once_the_replica_has_caught_up(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            dashboard_cache.bump(dashboard_cache.STUDENT, "1AB21CS001")
+        # a page rendered from a lagging replica is stored under this one
+        committed = dashboard_cache.version(dashboard_cache.STUDENT, "1AB21CS001")
+        deadline = time.monotonic() + 5
+        while dashboard_cache.version(dashboard_cache.STUDENT, "1AB21CS001") == committed:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+
+urlpatterns = [
+    path("api/get-student/", async_views.get_student, name="get_student"),
+    path("api/student/login/", async_views.api_student_login, name="api_student_login"),
+    path("api/student/profile/", async_views.api_get_profile, name="api_get_profile"),
+    path("api/teacher/cases/", async_views.api_teacher_cases, name="api_teacher_cases"),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncApiViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student_user = User.objects.create_user(username="1AB21CS001", email="s@example.com", password="pw")
+        StudentProfile.objects.create(user=cls.student_user, usn="1AB21CS001", full_name="Asha")
+        Student.objects.create(usn="1AB21CS001", name="Asha", email="s@example.com",
+                               department="CSE", year="3", password="x")
+        cls.teacher = User.objects.create_user(username="teacher", password="pw")
+
+    def setUp(self):
+        directory.clear()
+        self.addCleanup(activity.recorder.flush)
+
+    async def test_get_student_revalidates(self):
+        response = await self.async_client.get("/api/get-student/", {"usn": "1AB21CS001"})
+        self.assertEqual(response.json()["name"], "Asha")
+        again = await self.async_client.get(
+            "/api/get-student/", {"usn": "1AB21CS001"}, headers={"if-none-match": response["ETag"]}
+        )
+        self.assertEqual(again.status_code, 304)
+
+    async def test_login_then_profile(self):
+        response = await self.async_client.post(
+            "/api/student/login/", {"usn": "1AB21CS001", "password": "pw"}, content_type="application/json"
+        )
+        self.assertEqual(response.json()["profile"]["fullName"], "Asha")
+        profile = await self.async_client.get("/api/student/profile/")
+        self.assertEqual(profile.json()["activities"][0]["action"], "logged in")
+
+    async def test_teacher_cases_page(self):
+        await sync_to_async(lambda: [make_case(self.teacher) for _ in range(3)])()
+        await self.async_client.aforce_login(self.teacher)
+        response = await self.async_client.get("/api/teacher/cases/", {"limit": 2})
+        body = response.json()
+        self.assertEqual(len(body["cases"]), 2)
+        self.assertIsNotNone(body["next_cursor"])
+
+
+class BenchApiCommandTests(LiveServerTestCase):
+    databases = "__all__"  # the live server reads through the replica alias when one is configured
+
+    def test_reports_throughput(self):
+        Student.objects.create(usn="1AB21CS001", name="Asha", email="s@example.com",
+                               department="CSE", year="3", password="x")
+        out = io.StringIO()
+        call_command(
+            "bench_api", "--target", f"live={self.live_server_url}",
+            "--path", "/api/get-student/?usn=1AB21CS001", "--path", "/api/get-student/?usn=none",
+            "--requests", "20", "--concurrency", "4", stdout=out,
+        )
+        # the unknown USN answers 404, which counts as an error
+        self.assertIn("live:", out.getvalue())
+        self.assertIn("10 ok, 10 errors", out.getvalue())
 
-# Create your tests here.
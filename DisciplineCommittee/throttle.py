@@ -0,0 +1,151 @@
+"""Login throttling and login-cost metrics.
+
+Every password check runs a full PBKDF2 hash, so the login views ask
+allow_login() first: one token bucket per client IP and one per account
+identifier (USN or email), kept in LOGIN_THROTTLE_CACHE. A rejected
+attempt costs two cache reads and no hashing.
+
+The buckets are only shared by the workers that share that cache: with
+DCOMM_CACHE_PROFILE=production that is Redis, so every worker on every
+host, and local memory (the default profile) covers one process.
+
+The buckets are read-modify-write without a lock, so a burst racing
+across workers can get a few extra attempts through; the cap is what
+matters, not exactness.
+
+authenticate_timed() wraps authenticate() and adds the attempt, its
+outcome and the time spent hashing to counters in the same cache; see
+``manage.py login_stats``.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.contrib.auth import aauthenticate, authenticate
+from django.core.cache import caches
+
+METRIC_KEYS = ('attempts', 'succeeded', 'failed', 'throttled', 'auth_ms')
+
+
+def _cache():
+    return caches[settings.LOGIN_THROTTLE_CACHE]
+
+
+def client_ip(request):
+    if settings.LOGIN_THROTTLE_TRUST_X_FORWARDED_FOR:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _buckets(request, identity):
+    buckets = {f'login-throttle:ip:{client_ip(request)}': settings.LOGIN_THROTTLE_IP}
+    if identity:
+        buckets[f'login-throttle:id:{identity.strip().lower()}'] = settings.LOGIN_THROTTLE_IDENTITY
+    return buckets
+
+
+def _take(buckets, state, now):
+    """Refill and take one token from every bucket. Returns (retry_after, new state)."""
+    updated = {}
+    retry_after = 0
+    for key, (burst, per_seconds) in buckets.items():
+        rate = burst / per_seconds
+        tokens, stamp = state.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - stamp) * rate)
+        if tokens < 1:
+            retry_after = max(retry_after, (1 - tokens) / rate)
+        updated[key] = (tokens - 1, now)
+    return retry_after, updated
+
+
+def allow_login(request, identity):
+    """Take one token from the IP and identity buckets.
+
+    Returns ``(allowed, retry_after_seconds)``. Nothing is taken when
+    either bucket is empty.
+    """
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return True, 0
+    cache = _cache()
+    buckets = _buckets(request, identity)
+    retry_after, updated = _take(buckets, cache.get_many(list(buckets)), time.time())
+    if retry_after:
+        record('throttled')
+        return False, math.ceil(retry_after)
+    # an untouched bucket is full again after per_seconds, so let it expire
+    for key, value in updated.items():
+        cache.set(key, value, timeout=buckets[key][1])
+    return True, 0
+
+
+async def aallow_login(request, identity):
+    """Async version of allow_login()."""
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return True, 0
+    cache = _cache()
+    buckets = _buckets(request, identity)
+    retry_after, updated = _take(buckets, await cache.aget_many(list(buckets)), time.time())
+    if retry_after:
+        await arecord('throttled')
+        return False, math.ceil(retry_after)
+    for key, value in updated.items():
+        await cache.aset(key, value, timeout=buckets[key][1])
+    return True, 0
+
+
+def record(metric, amount=1):
+    cache = _cache()
+    key = f'login-metrics:{metric}'
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.set(key, amount, timeout=None)
+
+
+async def arecord(metric, amount=1):
+    cache = _cache()
+    key = f'login-metrics:{metric}'
+    await cache.aadd(key, 0, timeout=None)
+    try:
+        await cache.aincr(key, amount)
+    except ValueError:
+        await cache.aset(key, amount, timeout=None)
+
+
+def _outcome(user, started):
+    return [
+        ('attempts', 1),
+        ('succeeded' if user is not None else 'failed', 1),
+        ('auth_ms', round((time.perf_counter() - started) * 1000)),
+    ]
+
+
+def authenticate_timed(request, **credentials):
+    started = time.perf_counter()
+    user = authenticate(request, **credentials)
+    for metric, amount in _outcome(user, started):
+        record(metric, amount)
+    return user
+
+
+async def aauthenticate_timed(request, **credentials):
+    started = time.perf_counter()
+    user = await aauthenticate(request, **credentials)
+    for metric, amount in _outcome(user, started):
+        await arecord(metric, amount)
+    return user
+
+
+def login_metrics():
+    values = _cache().get_many([f'login-metrics:{m}' for m in METRIC_KEYS])
+    metrics = {m: values.get(f'login-metrics:{m}', 0) for m in METRIC_KEYS}
+    metrics['avg_auth_ms'] = metrics['auth_ms'] / metrics['attempts'] if metrics['attempts'] else 0
+    return metrics
+
+
+def reset_metrics():
+    _cache().delete_many([f'login-metrics:{m}' for m in METRIC_KEYS])
@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
+
+# JSON API: native async views under ASGI, the sync ones under WSGI
+api = async_views if settings.ASYNC_API_VIEWS else views
 
 urlpatterns = [
     path('', views.index, name='home'),
@@ -16,6 +20,7 @@ urlpatterns = [
     path("teacher/register/", views.teacher_register, name="teacher_register"),
     path("teacher/forgot-password/", views.teacher_forgot_password, name="teacher_forgot_password"),
     path('teacher-dashboard/', views.teacher_dashboard, name='teacher_dashboard'),
+    path('teacher/cases/', views.teacher_cases, name='teacher_cases'),
     
     # Case URLs
     path("cases/late/", views.case_late, name="case_late"),
@@ -24,15 +29,23 @@ urlpatterns = [
     path('cases/academic-misconduct/', views.academic_misconduct, name='case_academic'),
     path("cases/uniform-violations/", views.uniform_violations, name="uniform_violations"),
     path('cases/others/', views.other_cases, name='case_others'),
+    path('cases/export/', views.export_cases, name='export_cases'),
     
     # Committee URLs
     path('committee/', views.discipline_page, name='committee'),
 
     # API endpoints for student auth/profile
-    path("api/get-student/", views.get_student, name="get_student"),
-    path('api/student/register/', views.api_student_register, name='api_student_register'),
-    path('api/student/login/', views.api_student_login, name='api_student_login'),
-    path('api/student/profile/', views.api_get_profile, name='api_get_profile'),
-    path('api/student/profile/update/', views.api_update_profile, name='api_update_profile'),
-    path('api/logout/', views.api_logout, name='api_logout'),
+    path("api/get-student/", api.get_student, name="get_student"),
+    path("api/get-students/", api.get_students, name="get_students"),
+    path('api/student/register/', api.api_student_register, name='api_student_register'),
+    path('api/student/login/', api.api_student_login, name='api_student_login'),
+    path('api/student/profile/', api.api_get_profile, name='api_get_profile'),
+    path('api/student/profile/update/', api.api_update_profile, name='api_update_profile'),
+    path('api/student/cases/', api.api_student_cases, name='api_student_cases'),
+    path('api/student/events/', views.student_events, name='student_events'),
+    path('api/teacher/cases/', api.api_teacher_cases, name='api_teacher_cases'),
+    path('api/cases/search/', views.api_search_cases, name='api_search_cases'),
+    path('api/cases/batch/', views.api_create_cases, name='api_create_cases'),
+    path('api/analytics/cases/', views.api_case_analytics, name='api_case_analytics'),
+    path('api/logout/', api.api_logout, name='api_logout'),
 ]
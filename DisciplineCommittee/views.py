@@ -4,101 +4,254 @@ from django.shortcuts import render,redirect
 from django.http import HttpResponseRedirect
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.models import User,auth
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
 from django.utils import timezone
 import json
 from django.contrib import messages
 from .models import Student
 from django.contrib.auth.hashers import make_password, check_password
 from .models import Teacher
-from .models import StudentProfile, TeacherProfile, Activity
+from .models import StudentProfile, TeacherProfile, Activity, TeacherCaseStats
 from .models import Case
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from .models import UniformViolation
 from django.contrib.auth import logout
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
+import hashlib
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+import asyncio
+import time
+from .pagination import keyset_page, parse_limit
+from .filters import active_filters, filter_cases
+from .exports import EXPORT_FORMATS, iter_export
+from . import activity, analytics, dashboard_cache, directory, events, ingest, search, throttle
+from .counters import prior_counts
+from .db import retry_on_locked
+from .replicas import replica_reads
+from urllib.parse import urlencode
 
 # Simple views to render static templates
 
+def _posted_student(request):
+    # the directory record wins over these read-only fields (see ingest.py)
+    return {
+        "usn": request.POST.get("usn"),
+        "student_name": request.POST.get("student_name") or request.POST.get("name"),
+        "year": request.POST.get("year"),
+        "department": request.POST.get("department"),
+        "date": request.POST.get("date"),
+    }
+
+
+def _is_teacher(user):
+    """Staff, or any account without a StudentProfile.
+
+    api_student_login signs students in as ordinary users too, so being
+    logged in is not enough for teacher-only data.
+    """
+    if not user.is_authenticated:
+        return False
+    if not hasattr(user, '_is_teacher'):
+        user._is_teacher = user.is_staff or not StudentProfile.objects.filter(user=user).exists()
+    return user._is_teacher
+
+
+async def _ais_teacher(user):
+    """Async version of _is_teacher()."""
+    if not user.is_authenticated:
+        return False
+    if not hasattr(user, '_is_teacher'):
+        user._is_teacher = user.is_staff or not await StudentProfile.objects.filter(user=user).aexists()
+    return user._is_teacher
+
+
+def _file_case(request, template, data):
+    """File one case from a form through the same path as the batch API."""
+    if not _is_teacher(request.user):
+        return redirect("teacher_login")
+    result = ingest.ingest_cases([data], request.user)[0]
+    if result["status"] != "created":
+        for field, message in result["errors"].items():
+            messages.error(request, f"{field} {message}")
+        return render(request, template, status=400)
+    return redirect("teacher_dashboard")
+
+
 def index(request):
     return render(request, 'index.html')
 
 
+@retry_on_locked
 def case_late(request):
     if request.method == "POST":
         print(request.POST)  # 👈 DEBUG
-        usn = request.POST.get("usn")
-        # Try to get the student object for proper linking
-        student_obj = None
-        try:
-            student_obj = Student.objects.get(usn=usn)
-        except Student.DoesNotExist:
-            pass
-        
-        Case.objects.create(
-            case_type="Late Arrival",
-            usn=usn,
-            student_name=request.POST.get("name"),
-            year=request.POST.get("year"),
-            department=request.POST.get("department"),
-            description=request.POST.get("reason", "").strip(),
-            date=request.POST.get("date"),
-            created_by=request.user
-        )
-        return redirect("teacher_dashboard")
+        return _file_case(request, "Late Arrival.html", {
+            **_posted_student(request),
+            "case_type": "Late Arrival",
+            "description": request.POST.get("reason", ""),
+        })
 
     return render(request, "Late Arrival.html")
 
+@retry_on_locked
 def add_case(request):
     if request.method == "POST":
-        usn = request.POST.get("usn")
-        # Try to get the student object for proper linking
-        student_obj = None
-        try:
-            student_obj = Student.objects.get(usn=usn)
-        except Student.DoesNotExist:
-            pass
-        
-        Case.objects.create(
-            usn=usn,
-            student_name=request.POST.get("student_name"),
-            year=request.POST.get("year"),
-            department=request.POST.get("department"),
-            case_type=request.POST.get("case_type"),
-            date=request.POST.get("date"),
-            description=request.POST.get("description", ""),
-            created_by=request.user  # 🔐 critical
-        )
-        return redirect("teacher_dashboard")
+        return _file_case(request, "add_case.html", {
+            **_posted_student(request),
+            "case_type": request.POST.get("case_type"),
+            "description": request.POST.get("description", ""),
+        })
     return render(request, "add_case.html")
 
+def _student_json(student, prior_cases=None):
+    data = {
+        'name': student['name'],
+        'email': student['email'],
+        'department': student['department'],
+        'year': student['year'],
+    }
+    if prior_cases is not None:
+        # cases already on file per case type, for the forms' prior counts;
+        # disciplinary history, so only ever passed for teachers
+        data['prior_cases'] = prior_cases
+    return data
+
+
+def _etag(*parts):
+    return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def _student_etag(student, version, with_history):
+    # the student version moves with every case filed for the USN
+    return _etag(*(student[f] for f in directory.DIRECTORY_FIELDS), version, with_history)
+
+
+def _get_student_etag(request):
+    # served from the directory and version caches, so revalidation usually costs no query
+    student = directory.get_student(request.GET.get('usn'))
+    if student is None:
+        return None
+    return _student_etag(
+        student,
+        dashboard_cache.version(dashboard_cache.STUDENT, student['usn']),
+        _is_teacher(request.user),
+    )
+
+
+@replica_reads
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_get_student_etag)
 def get_student(request):
     usn = request.GET.get('usn')
 
-    try:
-        student = Student.objects.get(usn=usn)
-        return JsonResponse({
-            'name': student.name,
-            'email': student.email,
-            'department': student.department,
-            'year': student.year,
-        })
-    except Student.DoesNotExist:
+    student = directory.get_student(usn)
+    if student is None:
         return JsonResponse({'error': 'Student not found'}, status=404)
-    
+    if not _is_teacher(request.user):
+        return JsonResponse(_student_json(student))
+    prior_cases = prior_counts([student['usn']])[student['usn']]
+    return JsonResponse(_student_json(student, prior_cases))
+
+
+MAX_BATCH_USNS = 500
 
+
+def _requested_usns(request):
+    """The USNs of a get_students request; raises ValueError for a bad one."""
+    if request.method == 'POST':
+        try:
+            usns = json.loads(request.body).get('usns') or []
+        except (ValueError, AttributeError):
+            raise ValueError('invalid JSON') from None
+        if not isinstance(usns, list):
+            raise ValueError('usns must be a list')
+    else:
+        usns = request.GET.get('usns', '').split(',')
+
+    usns = [str(u).strip() for u in usns if str(u).strip()]
+    if not usns:
+        raise ValueError('usns required')
+    if len(usns) > MAX_BATCH_USNS:
+        raise ValueError(f'at most {MAX_BATCH_USNS} usns per request')
+    return usns
+
+
+def _students_json(usns, found, prior_cases):
+    return {
+        'students': {usn: _student_json(s, prior_cases[usn]) for usn, s in found.items()},
+        'missing': [usn for usn in dict.fromkeys(usns) if usn not in found],
+    }
+
+
+def get_students(request):
+    """Resolve a whole roster of USNs in one request, for logged-in teachers.
+
+    GET ?usns=A,B,C or POST {"usns": [...]} (with the CSRF token).
+    """
+    if not _is_teacher(request.user):
+        return JsonResponse({'error': 'not authorised'}, status=403)
+    try:
+        usns = _requested_usns(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    found = directory.get_students(usns)
+    return JsonResponse(_students_json(usns, found, prior_counts(list(found))))
+
+
+def _student_dashboard_version(request):
+    """``(usn, version)`` of the logged-in student's dashboard, or None.
+
+    Costs no query once the session holds the USN (set at login).
+    """
+    if not hasattr(request, '_dashboard_version'):
+        student_id = request.session.get('student_id')
+        usn = request.session.get('student_usn')
+        if student_id and not usn:
+            usn = Student.objects.filter(id=student_id).values_list('usn', flat=True).first()
+        request._dashboard_version = (
+            (usn, dashboard_cache.version(dashboard_cache.STUDENT, usn)) if usn else None
+        )
+    return request._dashboard_version
+
+
+def _student_dashboard_etag(request):
+    version = _student_dashboard_version(request)
+    return _etag('student-dashboard', *version) if version else None
+
+
+@replica_reads
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_student_dashboard_etag)
 def student_dashboard(request):
     student_id = request.session.get('student_id')
 
     if not student_id:
         return redirect('student_login')
 
+    version = _student_dashboard_version(request)
+    if version:
+        page = dashboard_cache.get_page(dashboard_cache.STUDENT, *version)
+        if page is not None:
+            return HttpResponse(page)
+
     try:
         student = Student.objects.get(id=student_id)
     except Student.DoesNotExist:
         request.session.flush()
         return redirect('student_login')
+    if request.session.get('student_usn') != student.usn:
+        request.session['student_usn'] = student.usn
+        version = (student.usn, dashboard_cache.version(dashboard_cache.STUDENT, student.usn))
 
     profile_data = {
         'fullName': student.name,
@@ -106,17 +259,16 @@ def student_dashboard(request):
         'email': student.email,
     }
 
-    # Filter cases ONLY for the logged-in student using usn
-    cases = Case.objects.filter(
-        usn=student.usn
-    ).order_by("-created_at")
+    # One query for both the stats and the recent items: the total is an
+    # uncorrelated scalar subquery, so SQLite evaluates it once.
+    student_cases = Case.objects.filter(usn=student.usn)
+    total = student_cases.order_by().values("usn").annotate(n=Count("id")).values("n")
+    recent_cases = list(
+        student_cases.annotate(total=Subquery(total))
+        .order_by("-created_at", "-id")[:3]
+    )
+    total_complaints = recent_cases[0].total if recent_cases else 0
 
-    # Calculate stats for THIS student only
-    total_complaints = cases.count()
-    
-    # Get recent complaints (last 3)
-    recent_complaints = cases[:3]
-    
     recent_complaints_data = [
         {
             'id': c.id,
@@ -125,33 +277,141 @@ def student_dashboard(request):
             'status': 'pending',  # Default status
             'description': c.description or ''
         }
-        for c in recent_complaints
-    ]
-
-    # JSON-serializable representation for client-side code
-    cases_json = [
-        {
-            'case_type': c.case_type,
-            'date': c.date.strftime('%Y-%m-%d') if getattr(c, 'date', None) else '',
-            'description': c.description or ''
-        }
-        for c in cases
+        for c in recent_cases
     ]
 
-    return render(
+    # Older history is fetched page by page from api_student_cases
+    response = render(
         request,
         'studentdashboard.html',
         {
             'profile': profile_data,
-            'cases': cases,
-            'cases_json': cases_json,
+            'cases': recent_cases,
             'total_complaints': total_complaints,
             'recent_complaints': recent_complaints_data,
         }
     )
+    if version:
+        dashboard_cache.set_page(dashboard_cache.STUDENT, *version, response.content)
+    return response
+
+
+STUDENT_CASE_FIELDS = ('id', 'case_type', 'date', 'description', 'created_at')
+
+
+def _student_case_rows(usn):
+    return Case.objects.filter(usn=usn).values(*STUDENT_CASE_FIELDS)
+
+
+def _student_cases_json(rows, next_cursor):
+    cases = [
+        {
+            'id': c['id'],
+            'case_type': c['case_type'],
+            'date': c['date'].isoformat() if c['date'] else '',
+            'description': c['description'] or '',
+        }
+        for c in rows
+    ]
+    return {'cases': cases, 'next_cursor': next_cursor}
+
+
+def api_student_cases(request):
+    """Paginated case history for the logged-in student (newest first)."""
+    student_id = request.session.get('student_id')
+    if not student_id:
+        return JsonResponse({'error': 'not authenticated'}, status=403)
+
+    usn = Student.objects.filter(id=student_id).values_list('usn', flat=True).first()
+    if usn is None:
+        return JsonResponse({'error': 'student not found'}, status=404)
+
+    try:
+        rows, next_cursor = keyset_page(
+            _student_case_rows(usn),
+            cursor=request.GET.get('cursor'),
+            limit=parse_limit(request.GET.get('limit')),
+        )
+    except ValueError:
+        return JsonResponse({'error': 'invalid cursor'}, status=400)
+    return JsonResponse(_student_cases_json(rows, next_cursor))
+
 
+def _sse(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data, cls=DjangoJSONEncoder)}']
+    return '\n'.join(lines) + '\n\n'
 
 
+def _case_events(cases):
+    return [_sse('case', case, event_id=case['id']) for case in cases]
+
+
+async def _student_event_stream(usn, last_id, missed):
+    # No database access from here on: new cases arrive as payloads on the
+    # queue (see events.py), so an open stream only costs a queue.
+    heartbeat = settings.STUDENT_EVENTS_HEARTBEAT
+    deadline = time.monotonic() + settings.STUDENT_EVENTS_MAX_AGE
+    queue = events.subscribe(usn, last_id)
+    sent = set()
+    try:
+        yield f'retry: {settings.STUDENT_EVENTS_RETRY_MS}\n' + _sse('ready', {}, event_id=last_id)
+        for message in _case_events(missed):
+            yield message
+        sent.update(case['id'] for case in missed)
+        while time.monotonic() < deadline:
+            try:
+                cases = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            cases = [c for c in cases if c['id'] > last_id and c['id'] not in sent]
+            sent.update(case['id'] for case in cases)
+            for message in _case_events(cases):
+                yield message
+    finally:
+        events.unsubscribe(usn, queue)
+
+
+async def student_events(request):
+    """Server-sent events announcing new cases for the logged-in student.
+
+    Under ASGI the stream stays open and is fed by events.publish();
+    DCOMM/asgi.py serves it outside the per-request thread context, so
+    open streams do not each keep a thread. Under WSGI it degrades to one
+    response per EventSource reconnect.
+    """
+    student_id = await request.session.aget('student_id')
+    if not student_id:
+        return JsonResponse({'error': 'not authenticated'}, status=403)
+    usn = await Student.objects.filter(id=student_id).values_list('usn', flat=True).afirst()
+    if usn is None:
+        return JsonResponse({'error': 'student not found'}, status=404)
+
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_id'))
+    except (TypeError, ValueError):
+        # first connection: only announce cases filed from now on
+        latest = await Case.objects.filter(usn=usn).aaggregate(latest=Max('id'))
+        last_id = latest['latest'] or 0
+        missed = []
+    else:
+        new_cases = Case.objects.filter(usn=usn, id__gt=last_id).order_by('id').values(*events.EVENT_FIELDS)
+        missed = [case async for case in new_cases]
+
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(
+            _student_event_stream(usn, last_id, missed), content_type='text/event-stream',
+        )
+    else:
+        # WSGI fallback: answer once and let EventSource reconnect after the
+        # retry delay instead of pinning a worker thread to one client.
+        messages = [f'retry: {settings.STUDENT_EVENTS_POLL_MS}\n' + _sse('ready', {}, event_id=last_id)]
+        response = HttpResponse(''.join(messages + _case_events(missed)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 
 def student_login(request):
     if request.method == "POST":
@@ -166,6 +426,8 @@ def student_login(request):
         if student and student.password == password:
             print("Login success")
             request.session['student_id'] = student.id
+            # lets the dashboard find its cache entry without a query
+            request.session['student_usn'] = student.usn
             print("Session saved:", request.session.get('student_id'))
             return redirect('student_dashboard')
         else:
@@ -218,7 +480,15 @@ def teacher_login(request):
         username = request.POST.get("email")
         password = request.POST.get("password")
 
-        user = authenticate(request, username=username, password=password)
+        # checked before authenticate() so a flood never reaches the hasher
+        allowed, retry_after = throttle.allow_login(request, username)
+        if not allowed:
+            messages.error(request, "Too many login attempts. Please try again later.")
+            response = render(request, "teacher-login.html", status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
+
+        user = throttle.authenticate_timed(request, username=username, password=password)
         if user:
             login(request, user)
             # respect next param so protected pages (eg. add_case) return correctly
@@ -250,16 +520,35 @@ def teacher_register(request):
     return render(request, "teacher-register.html")
 
 
+def _teacher_dashboard_etag(request):
+    version = dashboard_cache.version(dashboard_cache.TEACHER, request.user.pk)
+    request._dashboard_version = version
+    return _etag('teacher-dashboard', request.user.pk, version)
+
+
+@replica_reads
+@gzip_page
+@cache_control(private=True, no_cache=True)
 @login_required(login_url='teacher_login')
+@condition(etag_func=_teacher_dashboard_etag)
 def teacher_dashboard(request):
+    version = getattr(request, '_dashboard_version', None) or dashboard_cache.version(
+        dashboard_cache.TEACHER, request.user.pk
+    )
+    page = dashboard_cache.get_page(dashboard_cache.TEACHER, request.user.pk, version)
+    if page is not None:
+        return HttpResponse(page)
 
+    # the linked Student row comes in the same query; unlinked cases
+    # fall back to the copied student_name in the template
     cases = Case.objects.filter(
         created_by=request.user
-    ).order_by("-created_at")[:10]
+    ).select_related("student").order_by("-created_at")[:10]
 
-    total_cases = Case.objects.filter(
-        created_by=request.user
-    ).count()
+    # maintained by counters.py, so this is a single-row read
+    total_cases = TeacherCaseStats.objects.filter(
+        user=request.user
+    ).values_list('total', flat=True).first() or 0
 
     profile = None
     try:
@@ -275,84 +564,231 @@ def teacher_dashboard(request):
     except TeacherProfile.DoesNotExist:
         profile = None
 
-    return render(request, 'teacherdashboard.html', {
+    response = render(request, 'teacherdashboard.html', {
         'profile': profile,
         'cases': cases,
         'total_cases': total_cases,
     })
+    dashboard_cache.set_page(dashboard_cache.TEACHER, request.user.pk, version, response.content)
+    return response
+
+CASE_LIST_FIELDS = ('id', 'usn', 'student_name', 'year', 'department', 'case_type', 'date', 'created_at')
+
+
+def _teacher_case_rows(user, params):
+    """The teacher's cases filtered by ``params``; raises ValueError for bad filters."""
+    return filter_cases(Case.objects.filter(created_by=user), params).values(*CASE_LIST_FIELDS)
+
+
+def _teacher_case_page(request):
+    """One keyset page of the current teacher's cases, filtered by the query string."""
+    return keyset_page(
+        _teacher_case_rows(request.user, request.GET),
+        cursor=request.GET.get('cursor'),
+        limit=parse_limit(request.GET.get('limit'), default=25),
+    )
+
+
+def _teacher_cases_json(cases, next_cursor):
+    for c in cases:
+        c['date'] = c['date'].isoformat() if c['date'] else ''
+        c['created_at'] = c['created_at'].isoformat()
+    return {'cases': cases, 'next_cursor': next_cursor}
+
+
+@login_required(login_url='teacher_login')
+def teacher_cases(request):
+    try:
+        cases, next_cursor = _teacher_case_page(request)
+        error = None
+    except ValueError as e:
+        cases, next_cursor, error = [], None, str(e)
+
+    filters = active_filters(request.GET)
+    older_url = None
+    if next_cursor:
+        older_url = '?' + urlencode({**filters, 'cursor': next_cursor})
+
+    return render(request, 'teacher_cases.html', {
+        'cases': cases,
+        'filters': filters,
+        'case_types': [value for value, _ in Case.CASE_TYPES],
+        'older_url': older_url,
+        'error': error,
+    })
+
+
+def api_teacher_cases(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'not authenticated'}, status=403)
+    try:
+        cases, next_cursor = _teacher_case_page(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(_teacher_cases_json(cases, next_cursor))
+
+
+@retry_on_locked
+def api_create_cases(request):
+    """File a batch of cases: POST {"cases": [...]} or a bare JSON list.
+
+    Every item is validated; the valid ones are inserted together and the
+    response has one result per item, in order. This is also the sync
+    endpoint of the offline queue in forms.js: items with a client_key
+    that is already on file come back as duplicates with the filed id.
+    201 when every item was filed now, 400 when every item was invalid,
+    200 otherwise.
+    """
+    if not _is_teacher(request.user):
+        return JsonResponse({'error': 'not authorised'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=400)
+    try:
+        items = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'invalid JSON'}, status=400)
+    if isinstance(items, dict):
+        items = items.get('cases')
+    if not isinstance(items, list) or not items:
+        return JsonResponse({'error': 'cases must be a non-empty list'}, status=400)
+    if len(items) > ingest.MAX_BATCH_CASES:
+        return JsonResponse({'error': f'at most {ingest.MAX_BATCH_CASES} cases per request'}, status=400)
+
+    results = ingest.ingest_cases(items, request.user)
+    created = sum(result['status'] == 'created' for result in results)
+    duplicates = sum(result['status'] == 'duplicate' for result in results)
+    failed = len(results) - created - duplicates
+    status = 201 if created == len(results) else 400 if failed == len(results) else 200
+    return JsonResponse(
+        {'created': created, 'duplicates': duplicates, 'failed': failed, 'results': results},
+        status=status,
+    )
+
+
+@user_passes_test(lambda u: u.is_active and u.is_staff, login_url='teacher_login')
+def export_cases(request):
+    """Stream committee case dumps as CSV or NDJSON (?format=ndjson)."""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({'error': f'format must be one of {sorted(EXPORT_FORMATS)}'}, status=400)
+    try:
+        cases = filter_cases(Case.objects.all(), request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    response = StreamingHttpResponse(iter_export(cases, fmt), content_type=EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="cases.{fmt}"'
+    return response
+
+
+def api_search_cases(request):
+    """Ranked full-text search over case descriptions (?q=...&type=violations)."""
+    user = request.user
+    if not (user.is_authenticated and user.is_staff):
+        return JsonResponse({'error': 'not authorised'}, status=403)
+    if not search.search_available():
+        return JsonResponse({'error': 'full-text search is not available'}, status=501)
+
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': 'q required'}, status=400)
+
+    limit = parse_limit(request.GET.get('limit'))
+    if request.GET.get('type') == 'violations':
+        results = search.search_violations(query, limit)
+    else:
+        results = search.search_cases(query, limit)
+    return JsonResponse({'results': results}, json_dumps_params={'ensure_ascii': False})
+
 
 def teacher_logout(request):
     request.session.flush()
     return redirect("teacher_login")
 
 
+@retry_on_locked
 def uniform_violations(request):
     if request.method == "POST":
         print(request.POST)
-        violations_list = request.POST.getlist("violation")
-
-        Case.objects.create(
-            case_type="Uniform Violation",
-            usn=request.POST.get("usn"),
-            student_name=request.POST.get("name"),
-            year=request.POST.get("year"),
-            department=request.POST.get("department"),
-            description=(
-                "Violations: " + ", ".join(violations_list) +
-                "\nOther: " + request.POST.get("decription", "").strip()
-            ),
-            date=request.POST.get("date"),
-            created_by=request.user,
-        )
-
-        return redirect("teacher_dashboard")
+        return _file_case(request, "Uniform Violations.html", {
+            **_posted_student(request),
+            "case_type": "Uniform Violation",
+            "violations": request.POST.getlist("violation"),
+            "description": request.POST.get("description", ""),
+        })
 
     return render(request, "Uniform Violations.html")
 
+@retry_on_locked
 def academic_misconduct(request):
     if request.method == "POST":
         print(request.POST)  # DEBUG (optional)
 
-        Case.objects.create(
-            case_type="Academic Misconduct",
-            usn=request.POST.get("usn"),
-            student_name=request.POST.get("name"),
-            year=request.POST.get("year"),
-            department=request.POST.get("department"),
-            description=request.POST.get("description", "").strip(),
-            date=request.POST.get("date"),
-            created_by=request.user
-        )
-
-        return redirect("teacher_dashboard")
+        return _file_case(request, "Academic Misconduct.html", {
+            **_posted_student(request),
+            "case_type": "Academic Misconduct",
+            "description": request.POST.get("description", ""),
+        })
 
     return render(request, "Academic Misconduct.html")
 
 
+@retry_on_locked
 def other_cases(request):
     if request.method == "POST":
         print(request.POST)  # optional debug
 
-        Case.objects.create(
-            case_type="Other",
-            usn=request.POST.get("usn"),
-            student_name=request.POST.get("name"),
-            year=request.POST.get("year"),
-            department=request.POST.get("department"),
-            description=request.POST.get("description", "").strip(),
-            date=request.POST.get("date"),
-            created_by=request.user
-        )
-
-        return redirect("teacher_dashboard")
+        return _file_case(request, "Others.html", {
+            **_posted_student(request),
+            "case_type": "Other",
+            "description": request.POST.get("description", ""),
+        })
 
     return render(request, "Others.html")
 
 
 
 
+def _profile_json(profile, user):
+    return {
+        'fullName': profile.full_name,
+        'studentId': profile.usn,
+        'email': user.email,
+        'phone': profile.phone,
+        'course': profile.course,
+        'address': profile.address,
+    }
+
+
+@user_passes_test(_is_teacher, login_url='teacher_login')
 def discipline_page(request):
-    return HttpResponse("Discipline committee main page")
+    """Committee overview: case counts for any slice, from the rollups."""
+    params = request.GET.copy()
+    if not params.get('group_by'):
+        params['group_by'] = 'department,case_type'
+    try:
+        counts = analytics.case_counts(params)
+        error = None
+    except ValueError as e:
+        counts, error = {'total': 0, 'group_by': [], 'groups': []}, str(e)
+    return render(request, 'committee.html', {
+        'counts': counts,
+        'rows': [([group[d] for d in counts['group_by']], group['count']) for group in counts['groups']],
+        'filters': {name: params.get(name, '') for name in analytics.FILTER_FIELDS},
+        'case_types': [value for value, _ in Case.CASE_TYPES],
+        'dimensions': analytics.DIMENSIONS,
+        'error': error,
+    })
+
+
+def api_case_analytics(request):
+    """Case counts for a slice (?department=&year=&case_type=&month_from=&month_to=&group_by=)."""
+    if not _is_teacher(request.user):
+        return JsonResponse({'error': 'not authorised'}, status=403)
+    try:
+        return JsonResponse(analytics.case_counts(request.GET))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
 # ------------------ Simple JSON API endpoints (AJAX) ------------------
 @csrf_exempt
@@ -370,12 +806,18 @@ def api_student_register(request):
             return JsonResponse({'error': 'USN already registered'}, status=400)
         user = User.objects.create_user(username=usn, email=email, password=password)
         StudentProfile.objects.create(user=user, usn=usn)
-        Activity.objects.create(user=user, action='registered', details='Student registered')
+        activity.record(user, 'registered', 'Student registered')
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _throttled(retry_after):
+    response = JsonResponse({'error': 'too many login attempts', 'retry_after': retry_after}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 @csrf_exempt
 def api_student_login(request):
     if request.method != 'POST':
@@ -386,45 +828,57 @@ def api_student_login(request):
         password = data.get('password')
         if not (usn and password):
             return JsonResponse({'error': 'usn and password required'}, status=400)
+        allowed, retry_after = throttle.allow_login(request, usn)
+        if not allowed:
+            return _throttled(retry_after)
         try:
             profile = StudentProfile.objects.get(usn=usn)
             username = profile.user.username
         except StudentProfile.DoesNotExist:
             return JsonResponse({'error': 'invalid credentials'}, status=400)
-        user = authenticate(request, username=username, password=password)
+        user = throttle.authenticate_timed(request, username=username, password=password)
         if user is None:
             return JsonResponse({'error': 'invalid credentials'}, status=400)
         login(request, user)
-        Activity.objects.create(user=user, action='logged in', details='Student logged in')
-        activities = list(Activity.objects.filter(user=user).values('action', 'details', 'timestamp')[:10])
-        profile_data = {
-            'fullName': profile.full_name,
-            'studentId': profile.usn,
-            'email': user.email,
-            'phone': profile.phone,
-            'course': profile.course,
-            'address': profile.address,
-        }
+        activity.record(user, 'logged in', 'Student logged in')
+        activities = activity.recent_activities(user)
+        profile_data = _profile_json(profile, user)
         return JsonResponse({'success': True, 'profile': profile_data, 'activities': activities})
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _profile_version(user):
+    latest_activity = Activity.objects.filter(user=OuterRef('user')).order_by('-timestamp', '-id').values('id')[:1]
+    return StudentProfile.objects.filter(user=user).annotate(
+        latest_activity=Subquery(latest_activity)
+    ).values_list('id', 'updated_at', 'latest_activity')
+
+
+def _profile_etag_from(user, row):
+    # buffered activities are part of the response but not yet in the table
+    return _etag('profile', user.email, activity.latest_pending_timestamp(user), *row) if row else None
+
+
+def _profile_etag(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    return _profile_etag_from(user, _profile_version(user).first())
+
+
+@replica_reads
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_profile_etag)
 def api_get_profile(request):
     user = request.user
     if not user.is_authenticated:
         return JsonResponse({'error': 'not authenticated'}, status=403)
     try:
         profile = StudentProfile.objects.get(user=user)
-        profile_data = {
-            'fullName': profile.full_name,
-            'studentId': profile.usn,
-            'email': user.email,
-            'phone': profile.phone,
-            'course': profile.course,
-            'address': profile.address,
-        }
-        activities = list(Activity.objects.filter(user=user).values('action', 'details', 'timestamp')[:10])
+        profile_data = _profile_json(profile, user)
+        activities = activity.recent_activities(user)
         return JsonResponse({'profile': profile_data, 'activities': activities})
     except StudentProfile.DoesNotExist:
         return JsonResponse({'error': 'profile not found'}, status=404)
@@ -446,15 +900,8 @@ def api_update_profile(request):
                 setattr(profile, field, data[field])
                 changed_fields.append(field)
         profile.save()
-        Activity.objects.create(user=user, action='updated profile', details=f'updated fields: {changed_fields}')
-        profile_data = {
-            'fullName': profile.full_name,
-            'studentId': profile.usn,
-            'email': user.email,
-            'phone': profile.phone,
-            'course': profile.course,
-            'address': profile.address,
-        }
+        activity.record(user, 'updated profile', f'updated fields: {changed_fields}')
+        profile_data = _profile_json(profile, user)
         return JsonResponse({'success': True, 'profile': profile_data})
     except StudentProfile.DoesNotExist:
         return JsonResponse({'error': 'profile not found'}, status=404)